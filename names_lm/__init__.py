@@ -0,0 +1,40 @@
+"""
+Character-level language models of Indian first names.
+
+The data, n-gram and evaluation modules only need numpy (and pandas to read the
+csv files), so importing the package is cheap. The neural models need torch:
+they are imported from names_lm.neural on first access, e.g. names_lm.FNN_LM.
+
+Settings such as COUNT_WORKERS or CORPUS_CACHE_DIR are read from their module,
+so they are changed there, e.g. names_lm.ngram.COUNT_WORKERS = 4.
+"""
+
+import importlib
+
+from names_lm.data import (START, END, UNK, Vocab, set_vocab, get_vocab, build_vocab,
+                           build_vocab_from_itos, tokenize_name, process_data_for_input,
+                           EncodedCorpus, read_names, read_dataframe,
+                           get_tokenised_text_and_vocab, get_corpus_ids,
+                           read_array_file, write_array_file)
+from names_lm.ngram import (CountTable, NGramTrie, get_unigram_counts, get_bigram_counts,
+                            get_trigram_counts, add_counts, fit_lambdas_em, fit_lambdas_grid,
+                            NGramLanguageModel, UnigramModel, SmoothedUnigramModel,
+                            BigramModel, LaplaceSmoothedBigramModel,
+                            InterpolationSmoothedBigramModel, TrigramModel)
+from names_lm.evaluation import (check_validity, check_validity_of_table,
+                                 validate_probability_distribution, eval_ngram_model, eval_rnn_model)
+from names_lm.profiling import EvalProfiler, JsonLinesSink
+
+NEURAL_NAMES = {"collate_ngram", "NGramWindowDataset", "BatchIndexSampler", "get_dataloader", "FNN_LM",
+                "NeuralNGramTrainer", "RNN_LM", "RNNTrainer", "collate_for_rnn",
+                "get_dataloader_for_rnn"} # served lazily by __getattr__
+
+
+def __getattr__(name):
+    """
+    Imports names_lm.neural (and torch) when one of its names is first accessed
+    """
+
+    if name in NEURAL_NAMES:
+        return getattr(importlib.import_module("names_lm.neural"), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,527 @@
+"""
+Benchmarks of the language models on synthetic corpora of names.
+
+For every model class and corpus size, times fitting the model (the
+get_*_counts functions, or one training epoch for the neural models),
+get_next_char_probabilities, get_perplexity, generate_names and
+get_most_likely_chars, and reports their throughput and peak memory.
+The results are written as JSON, so that two runs can be compared:
+
+    python -m names_lm.benchmark --names 10000 1000000 --output before.json
+    python -m names_lm.benchmark --names 10000 1000000 --compare before.json
+
+The notebook code.py at the root of the repository shadows the standard library
+module code, which torch imports. main() works around it, but code calling the
+neural benchmarks directly must not have the root of the repository on sys.path.
+"""
+
+import os
+import sys
+import gc
+import importlib
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+try:
+    import resource
+except ImportError: # not available on windows
+    resource = None
+
+from names_lm import data, ngram
+
+
+BENCHMARK_SIZES = (10000,) # default numbers of names of the synthetic training corpora
+BENCHMARK_REPEATS = 3 # number of timed runs of every operation
+SYNTHETIC_ALPHABET = "abcdefghijklmnopqrstuvwxyz" # chars of the synthetic names
+SYNTHETIC_LENGTHS = (3, 10) # smallest and largest length of a synthetic name
+SYNTHETIC_CHUNK_SIZE = 1000000 # number of synthetic names generated at once
+VALIDATION_FRACTION = 0.1 # size of the validation corpus, relative to the training corpus
+GENERATE_NAMES = 1000 # number of names generated by an n-gram model per call of generate_names
+TOP_K_QUERIES = 1000 # number of get_most_likely_chars calls timed together
+TOP_K = 5 # number of most likely chars asked for
+NEURAL_MAX_NAMES = 20000 # largest corpus on which the neural models are trained and scored
+NEURAL_GENERATE_NAMES = 50 # number of names generated by a neural model per call of generate_names
+NEURAL_TOP_K_QUERIES = 100 # number of get_most_likely_chars calls timed together for the neural models
+
+NGRAM_MODELS = {
+    "UnigramModel": (1, lambda text: ngram.UnigramModel(text)),
+    "SmoothedUnigramModel": (1, lambda text: ngram.SmoothedUnigramModel(text)),
+    "BigramModel": (2, lambda text: ngram.BigramModel(text)),
+    "LaplaceSmoothedBigramModel": (2, lambda text: ngram.LaplaceSmoothedBigramModel(text, k=0.7)),
+    "InterpolationSmoothedBigramModel": (2, lambda text: ngram.InterpolationSmoothedBigramModel(text, lambdas=(0.5, 0.5))),
+    "TrigramModel": (3, lambda text: ngram.TrigramModel(text)),
+} # order and constructor of the n-gram models
+NEURAL_MODELS = ("NeuralNGramTrainer", "RNNTrainer")
+COUNT_FUNCTIONS = ("get_unigram_counts", "get_bigram_counts", "get_trigram_counts")
+
+
+def make_synthetic_corpus(num_names, vocab, seed=0):
+    """
+    Generates a corpus of random names, without building any python string.
+    The chars of a name follow a random first order Markov chain over SYNTHETIC_ALPHABET,
+    so that the bigrams and trigrams of the corpus are skewed like the ones of real names.
+
+    Args:
+        num_names [int]: number of names
+        vocab: vocabulary; it must contain the chars of SYNTHETIC_ALPHABET
+        seed [int]: seed of the random generator
+
+    Returns:
+        corpus [data.EncodedCorpus]: names enclosed in START and END tokens
+    """
+
+    rng = np.random.default_rng(seed)
+    A = len(SYNTHETIC_ALPHABET)
+    # the transition matrix is the same for every seed, only the names differ
+    transitions = np.random.default_rng(0).dirichlet(np.full(A, 0.3), size=A+1)
+    cdf = np.cumsum(transitions, axis=1)
+    char_ids = np.array([vocab[char] for char in SYNTHETIC_ALPHABET])
+    id_dtype = np.min_scalar_type(len(vocab)-1)
+
+    ids, offsets = [], [np.zeros(1, dtype=np.int64)]
+    total = 0
+    for start in range(0, num_names, SYNTHETIC_CHUNK_SIZE):
+        n = min(SYNTHETIC_CHUNK_SIZE, num_names - start)
+        lengths = rng.integers(SYNTHETIC_LENGTHS[0], SYNTHETIC_LENGTHS[1]+1, size=n)
+        chars = np.empty((n, SYNTHETIC_LENGTHS[1]), dtype=np.int64)
+        previous = np.full(n, A) # row A of transitions is the distribution of the first char
+        for t in range(SYNTHETIC_LENGTHS[1]):
+            previous = np.minimum((cdf[previous] < rng.random((n, 1))).sum(axis=1), A-1)
+            chars[:, t] = previous
+
+        # lay out START, the first length chars and END of every name contiguously
+        row_ids = np.empty((n, SYNTHETIC_LENGTHS[1]+2), dtype=id_dtype)
+        row_ids[:, 0] = vocab[data.START]
+        row_ids[:, 1:-1] = char_ids[chars]
+        row_ids[np.arange(n), lengths+1] = vocab[data.END]
+        ids.append(row_ids[np.arange(SYNTHETIC_LENGTHS[1]+2) < (lengths+2)[:, None]])
+        offsets.append(total + np.cumsum(lengths+2))
+        total += int((lengths+2).sum())
+
+    offsets = data.EncodedCorpus.narrow_offsets(np.concatenate(offsets))
+    return data.EncodedCorpus(np.concatenate(ids), offsets, vocab.get_itos())
+
+
+def make_queries(corpus, num_queries, seed=0):
+    """
+    Picks prefixes of names of a corpus, to be used as generate_names prefixes
+    and get_most_likely_chars sequences
+
+    Returns:
+        queries [list[list[str]]]: list of sequences of 1 to 3 chars
+    """
+
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.integers(0, len(corpus), size=num_queries):
+        name = corpus[int(i)][1:-1]
+        queries.append(name[:rng.integers(1, 4)])
+    return queries
+
+
+def get_max_rss():
+    """
+    Returns the peak resident set size of the process in bytes,
+    or None where the resource module is not available (windows)
+    """
+
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def run_operation(operation, repeats, setup=None, measure_memory=True):
+    """
+    Times an operation, then runs it once more with tracemalloc to measure its peak memory
+
+    Args:
+        operation [callable]: function without arguments to time
+        repeats [int]: number of timed runs
+        setup [callable]: function called before every run, outside of the timing
+        measure_memory [bool]: if False, the peak memory is not measured
+
+    Returns:
+        seconds [list[float]]: duration of every timed run
+        peak_bytes [int]: largest amount of memory allocated (and traced by tracemalloc)
+                          during a run, None if not measured
+    """
+
+    seconds = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        seconds.append(time.perf_counter() - start)
+
+    peak_bytes = None
+    if measure_memory:
+        if setup is not None:
+            setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            operation()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak_bytes
+
+
+def make_record(model, operation, num_names, items, unit, seconds, peak_bytes):
+    """
+    Returns the result of an operation as a JSON serializable dictionary
+    """
+
+    best = min(seconds)
+    return {
+        "model": model,
+        "operation": operation,
+        "num_names": num_names,
+        "items": items,
+        "unit": unit,
+        "seconds": seconds,
+        "best_seconds": best,
+        "median_seconds": statistics.median(seconds),
+        "items_per_second": items / best if best > 0 else None,
+        "peak_traced_bytes": peak_bytes,
+        "max_rss_bytes": get_max_rss(),
+    }
+
+
+def benchmark_counts(train_text, repeats, measure_memory):
+    """
+    Times the get_*_counts functions on a corpus
+    """
+
+    records = []
+    for name in COUNT_FUNCTIONS:
+        count_function = getattr(ngram, name)
+        seconds, peak_bytes = run_operation(lambda: count_function(train_text), repeats,
+                                            measure_memory=measure_memory)
+        records.append(make_record(None, name, len(train_text), len(train_text), "names",
+                                   seconds, peak_bytes))
+    return records
+
+
+def benchmark_ngram_model(name, train_text, validation_text, queries, repeats, measure_memory):
+    """
+    Times the operations of an n-gram model class
+
+    Args:
+        name [str]: name of the class (a key of NGRAM_MODELS)
+        train_text [data.EncodedCorpus]: training corpus
+        validation_text [data.EncodedCorpus]: corpus whose perplexity is computed
+        queries [list[list[str]]]: prefixes of generate_names and sequences of get_most_likely_chars
+        repeats [int]: number of timed runs of every operation
+        measure_memory [bool]: measure the peak memory of every operation
+
+    Returns:
+        records [list[dict]]: one record per operation (see make_record)
+    """
+
+    build_model = NGRAM_MODELS[name][1]
+    records = []
+    num_names = len(train_text)
+
+    seconds, peak_bytes = run_operation(lambda: build_model(train_text), repeats,
+                                        measure_memory=measure_memory)
+    records.append(make_record(name, "fit", num_names, num_names, "names", seconds, peak_bytes))
+    model = build_model(train_text)
+
+    # the probabilities are cached by the model, so the caches are dropped before every run
+    seconds, peak_bytes = run_operation(model.get_next_char_probabilities, repeats,
+                                        setup=model.clear_caches, measure_memory=measure_memory)
+    records.append(make_record(name, "get_next_char_probabilities", num_names, 1, "calls",
+                               seconds, peak_bytes))
+
+    seconds, peak_bytes = run_operation(lambda: model.get_perplexity(validation_text), repeats,
+                                        measure_memory=measure_memory)
+    records.append(make_record(name, "get_perplexity", num_names, len(validation_text), "names",
+                               seconds, peak_bytes))
+
+    np.random.seed(42)
+    seconds, peak_bytes = run_operation(lambda: model.generate_names(k=GENERATE_NAMES), repeats,
+                                        measure_memory=measure_memory)
+    records.append(make_record(name, "generate_names", num_names, GENERATE_NAMES, "names",
+                               seconds, peak_bytes))
+
+    sequences = queries[:TOP_K_QUERIES]
+    seconds, peak_bytes = run_operation(
+        lambda: [model.get_most_likely_chars(sequence, TOP_K) for sequence in sequences],
+        repeats, measure_memory=measure_memory)
+    records.append(make_record(name, "get_most_likely_chars", num_names, len(sequences), "calls",
+                               seconds, peak_bytes))
+    return records
+
+
+def build_neural_trainer(name, train_text, validation_text, vocab):
+    """
+    Builds a small neural model and its trainer, like the notebook does
+
+    Returns:
+        trainer [NeuralNGramTrainer or RNNTrainer]
+        kwargs [dict]: extra arguments of generate_names
+    """
+
+    import torch
+    from names_lm import neural
+
+    torch.manual_seed(42)
+    if name == "NeuralNGramTrainer":
+        n = 5
+        train_dataloader = neural.get_dataloader(train_text, vocab, ngram=n, batch_size=1024, shuffle=True)
+        valid_dataloader = neural.get_dataloader(validation_text, vocab, ngram=n, batch_size=1024, shuffle=False)
+        model = neural.FNN_LM(vocab_size=len(vocab), emb_size=16, hid_size=64, ngram=n)
+        optimizer = torch.optim.AdamW(model.parameters(), lr=2e-3, weight_decay=0.03)
+        trainer = neural.NeuralNGramTrainer(
+            ngram=n, model=model, optimizer=optimizer, criterion=torch.nn.functional.cross_entropy,
+            train_dataloader=train_dataloader, valid_dataloader=valid_dataloader, epochs=1,
+            use_cuda=neural.USE_CUDA, vocab=vocab, model_dir=None)
+        return trainer, {}
+
+    train_dataloader = neural.get_dataloader_for_rnn(train_text, vocab, 64, True)
+    valid_dataloader = neural.get_dataloader_for_rnn(validation_text, vocab, 64, False)
+    model = neural.RNN_LM(32, 1, 0.0, vocab_size=len(vocab))
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-2, weight_decay=0.03)
+    trainer = neural.RNNTrainer(
+        model=model, optimizer=optimizer, criterion=torch.nn.functional.cross_entropy,
+        train_dataloader=train_dataloader, valid_dataloader=valid_dataloader, epochs=1,
+        use_cuda=neural.USE_CUDA, vocab=vocab, model_dir=None)
+    return trainer, {"n": 15}
+
+
+def benchmark_neural_model(name, train_text, validation_text, queries, vocab, repeats, measure_memory):
+    """
+    Times the operations of a neural trainer; fitting is one training epoch.
+    The corpora are truncated to NEURAL_MAX_NAMES names.
+    Memory allocated by torch is not traced by tracemalloc, see max_rss_bytes instead.
+
+    Returns:
+        records [list[dict]]: one record per operation (see make_record)
+    """
+
+    import torch
+
+    num_names = len(train_text)
+    train_text = train_text[:NEURAL_MAX_NAMES]
+    validation_text = validation_text[:NEURAL_MAX_NAMES]
+    trainer, generate_kwargs = build_neural_trainer(name, train_text, validation_text, vocab)
+    records = []
+
+    def fit():
+        trainer.model.train()
+        trainer.train_epoch(trainer.train_dataloader)
+
+    seconds, peak_bytes = run_operation(fit, repeats, measure_memory=measure_memory)
+    records.append(make_record(name, "fit", num_names, len(train_text), "names", seconds, peak_bytes))
+
+    seconds, peak_bytes = run_operation(trainer.get_next_char_probabilities, repeats,
+                                        measure_memory=measure_memory)
+    records.append(make_record(name, "get_next_char_probabilities", num_names, 1, "calls",
+                               seconds, peak_bytes))
+
+    seconds, peak_bytes = run_operation(lambda: trainer.get_perplexity(validation_text), repeats,
+                                        measure_memory=measure_memory)
+    records.append(make_record(name, "get_perplexity", num_names, len(validation_text), "names",
+                               seconds, peak_bytes))
+
+    np.random.seed(42)
+    torch.manual_seed(42)
+    seconds, peak_bytes = run_operation(
+        lambda: trainer.generate_names(k=NEURAL_GENERATE_NAMES, **generate_kwargs), repeats,
+        measure_memory=measure_memory)
+    records.append(make_record(name, "generate_names", num_names, NEURAL_GENERATE_NAMES, "names",
+                               seconds, peak_bytes))
+
+    sequences = queries[:NEURAL_TOP_K_QUERIES]
+    seconds, peak_bytes = run_operation(
+        lambda: [trainer.get_most_likely_chars(sequence, TOP_K) for sequence in sequences],
+        repeats, measure_memory=measure_memory)
+    records.append(make_record(name, "get_most_likely_chars", num_names, len(sequences), "calls",
+                               seconds, peak_bytes))
+    return records
+
+
+def get_environment():
+    """
+    Returns the versions of the code and of the libraries a benchmark ran with
+    """
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    environment = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    if "torch" in sys.modules:
+        environment["torch"] = sys.modules["torch"].__version__
+    return environment
+
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, models=None, repeats=BENCHMARK_REPEATS,
+                   measure_memory=True, seed=0, log=print):
+    """
+    Runs the benchmarks of some model classes on synthetic corpora of some sizes
+
+    Args:
+        sizes [list[int]]: numbers of names of the training corpora
+        models [list[str]]: names of the model classes to benchmark; None for all of them
+        repeats [int]: number of timed runs of every operation
+        measure_memory [bool]: measure the peak memory of every operation
+        seed [int]: seed of the synthetic corpora
+        log [callable]: called with a line of progress for every record; None to be silent
+
+    Returns:
+        results [dict]: configuration, environment and records of the benchmark
+    """
+
+    if models is None:
+        models = list(NGRAM_MODELS) + list(NEURAL_MODELS)
+    unknown = [name for name in models if name not in NGRAM_MODELS and name not in NEURAL_MODELS]
+    if unknown:
+        raise ValueError(f"unknown model classes {unknown}; choose from {list(NGRAM_MODELS) + list(NEURAL_MODELS)}")
+
+    vocab = data.build_vocab([])
+    data.set_vocab(vocab)
+
+    records = []
+    for size in sizes:
+        train_text = make_synthetic_corpus(size, vocab, seed=seed)
+        validation_text = make_synthetic_corpus(max(1, int(size*VALIDATION_FRACTION)), vocab, seed=seed+1)
+        queries = make_queries(validation_text, TOP_K_QUERIES, seed=seed)
+
+        new_records = benchmark_counts(train_text, repeats, measure_memory)
+        for name in models:
+            if name in NGRAM_MODELS:
+                new_records += benchmark_ngram_model(name, train_text, validation_text, queries,
+                                                     repeats, measure_memory)
+            else:
+                new_records += benchmark_neural_model(name, train_text, validation_text, queries,
+                                                      vocab, repeats, measure_memory)
+            if log is not None:
+                for record in new_records:
+                    log(format_record(record))
+            records += new_records
+            new_records = []
+
+    return {
+        "config": {
+            "sizes": list(sizes),
+            "models": list(models),
+            "repeats": repeats,
+            "seed": seed,
+            "count_workers": ngram.COUNT_WORKERS,
+            "count_with_arrays": ngram.COUNT_WITH_ARRAYS,
+        },
+        "environment": get_environment(),
+        "records": records,
+    }
+
+
+def format_record(record):
+    """
+    Formats a record as one line of text
+    """
+
+    peak = record["peak_traced_bytes"]
+    peak = "-" if peak is None else f"{peak / 2**20:.1f} MiB"
+    return (f"{record['num_names']:>9} {str(record['model'] or '-'):<33} {record['operation']:<28} "
+            f"{record['best_seconds']:>10.4f} s {record['items_per_second'] or 0:>14,.1f} "
+            f"{record['unit']}/s  peak {peak}")
+
+
+def compare_results(base, results):
+    """
+    Pairs the records of two benchmark runs
+
+    Args:
+        base [dict]: results of the reference run (see run_benchmarks)
+        results [dict]: results of the new run
+
+    Returns:
+        list of (model, operation, num_names, base_seconds, seconds, speedup) tuples
+        for the records found in both runs; speedup is None if seconds is 0
+    """
+
+    base_seconds = {(record["model"], record["operation"], record["num_names"]): record["best_seconds"]
+                    for record in base["records"]}
+    comparison = []
+    for record in results["records"]:
+        key = (record["model"], record["operation"], record["num_names"])
+        if key in base_seconds:
+            speedup = base_seconds[key] / record["best_seconds"] if record["best_seconds"] > 0 else None
+            comparison.append(key + (base_seconds[key], record["best_seconds"], speedup))
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the language models on synthetic names.")
+    parser.add_argument("--names", type=int, nargs="+", default=list(BENCHMARK_SIZES),
+                        help="numbers of names of the synthetic training corpora")
+    parser.add_argument("--models", nargs="+", default=None,
+                        help="model classes to benchmark (default: all of them)")
+    parser.add_argument("--repeats", type=int, default=BENCHMARK_REPEATS,
+                        help="number of timed runs of every operation")
+    parser.add_argument("--workers", type=int, default=ngram.COUNT_WORKERS,
+                        help="number of processes counting n-grams (COUNT_WORKERS)")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="do not measure the peak memory of the operations")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic corpora")
+    parser.add_argument("--output", help="file to write the JSON results to (default: stdout)")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    # python -m from the root of the repository puts the root on sys.path, where code.py
+    # shadows the standard library module code: import the standard library one first
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if "code" not in sys.modules and os.path.exists(os.path.join(root, "code.py")):
+        path = sys.path[:]
+        sys.path[:] = [p for p in path if os.path.abspath(p or os.curdir) != root]
+        try:
+            importlib.import_module("code")
+        finally:
+            sys.path[:] = path
+
+    ngram.COUNT_WORKERS = args.workers
+    log = lambda line: print(line, file=sys.stderr)
+    results = run_benchmarks(args.names, args.models, args.repeats,
+                             measure_memory=not args.no_memory, seed=args.seed, log=log)
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+    else:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=1)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            base = json.load(file)
+        for model, operation, num_names, base_seconds, seconds, speedup in compare_results(base, results):
+            # operations too fast to be timed have no speedup
+            speedup = "n/a" if speedup is None else f"x{speedup:.2f}"
+            print(f"{num_names:>9} {str(model or '-'):<33} {operation:<28} {base_seconds:>10.4f} s "
+                  f"-> {seconds:>10.4f} s  {speedup}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,604 @@
+"""
+Reading, tokenizing and encoding the names datasets.
+
+Nothing heavier than numpy is imported here: pandas is only imported when a csv
+file is read, and the vocabulary does not depend on torchtext.
+"""
+
+import os
+import json
+import hashlib
+from collections import Counter
+
+import numpy as np
+
+
+ARRAY_FILE_MAGIC = b"NGRAMLM\0" # first bytes of a file written by write_array_file (saved models, cached corpora)
+ARRAY_FILE_VERSION = 1 # version of the layout of the array files
+ARRAY_FILE_ALIGNMENT = 64 # byte alignment of the arrays in an array file
+
+
+def write_array_file(path, header, arrays):
+    """
+    Writes a JSON header and numpy arrays to a binary file.
+    Layout: magic | version (uint32) | header size (uint64) | header | arrays,
+    with every array aligned to ARRAY_FILE_ALIGNMENT bytes so that it can be memory-mapped.
+
+    Args:
+        path [str]: file to write
+        header [dict]: JSON serialisable description of the arrays
+        arrays [dict[str, np.ndarray]]: arrays to write, by name
+    """
+
+    manifest = dict()
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        manifest[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ARRAY_FILE_ALIGNMENT) * ARRAY_FILE_ALIGNMENT
+    encoded = json.dumps(dict(header, arrays=manifest)).encode("utf-8")
+
+    prefix = len(ARRAY_FILE_MAGIC) + 4 + 8 + len(encoded)
+    data_start = -(-prefix // ARRAY_FILE_ALIGNMENT) * ARRAY_FILE_ALIGNMENT
+    with open(path, "wb") as file:
+        file.write(ARRAY_FILE_MAGIC)
+        file.write(np.uint32(ARRAY_FILE_VERSION).tobytes())
+        file.write(np.uint64(len(encoded)).tobytes())
+        file.write(encoded)
+        for name, array in arrays.items():
+            file.seek(data_start + manifest[name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(data_start + offset)
+
+
+def read_array_file(path):
+    """
+    Memory-maps a file written by write_array_file.
+    The arrays are copy-on-write views of the file: their pages are shared by every
+    process which maps the file, and changes made to them are never written back.
+
+    Args:
+        path [str]: file to read
+
+    Returns:
+        header [dict]: the JSON header
+        arrays [dict[str, np.ndarray]]: the arrays, by name
+    """
+
+    with open(path, "rb") as file:
+        magic = file.read(len(ARRAY_FILE_MAGIC))
+        if magic != ARRAY_FILE_MAGIC:
+            raise ValueError(f"{path} is not an array file")
+        version = int(np.frombuffer(file.read(4), dtype=np.uint32)[0])
+        if version != ARRAY_FILE_VERSION:
+            raise ValueError(f"{path} has version {version}, expected {ARRAY_FILE_VERSION}")
+        size = int(np.frombuffer(file.read(8), dtype=np.uint64)[0])
+        header = json.loads(file.read(size).decode("utf-8"))
+
+    prefix = len(ARRAY_FILE_MAGIC) + 4 + 8 + size
+    data_start = -(-prefix // ARRAY_FILE_ALIGNMENT) * ARRAY_FILE_ALIGNMENT
+    buffer = np.memmap(path, dtype=np.uint8, mode="c")
+    arrays = dict()
+    for name, spec in header.pop("arrays").items():
+        dtype = np.dtype(spec["dtype"])
+        start = data_start + spec["offset"]
+        nbytes = dtype.itemsize * int(np.prod(spec["shape"], dtype=np.int64))
+        arrays[name] = buffer[start:start+nbytes].view(dtype).reshape(spec["shape"])
+    return header, arrays
+
+
+DATA_DIR = "/content" # directory holding the {ds_type}_data.csv files
+CORPUS_CACHE = True # cache the corpora encoded by get_tokenised_text_and_vocab
+CORPUS_CACHE_DIR = None # directory of the encoded corpora; None for a corpus_cache directory in DATA_DIR
+CORPUS_CACHE_VERSION = 1 # version of the encoding of cached corpora
+READ_CHUNK_SIZE = 100000 # number of rows parsed at once when streaming a csv file
+
+
+def get_data_path(ds_type):
+    """
+    Returns the path of the csv file of a dataset type
+    """
+
+    return os.path.join(DATA_DIR, f"{ds_type}_data.csv")
+
+
+def get_corpus_cache_dir():
+    """
+    Returns the directory of the encoded corpora. It is resolved on every call,
+    so that DATA_DIR and CORPUS_CACHE_DIR can be changed after the import.
+    """
+
+    if CORPUS_CACHE_DIR is None:
+        return os.path.join(DATA_DIR, "corpus_cache")
+    return CORPUS_CACHE_DIR
+
+
+def read_names(ds_type, chunksize=READ_CHUNK_SIZE):
+    """
+    Streams the names of a dataset, without loading the whole csv file at once
+
+    Args:
+        ds_type [str]: dataset type (train or valid)
+        chunksize [int]: number of rows parsed at once
+
+    Returns:
+        iterator over pandas series of names, one per chunk of the file
+    """
+
+    import pandas as pd
+
+    for df in pd.read_csv(get_data_path(ds_type), header=0, index_col=0, chunksize=chunksize):
+        yield df.loc[~df['Name'].isna(), 'Name'].astype(str)
+
+
+def read_dataframe(ds_type):
+    """
+    Args:
+        ds_type [str] :  dataset type (train or valid)
+
+    Returns:
+        df [pandas dataframe]
+    """
+
+    import pandas as pd
+
+    df = pd.read_csv(get_data_path(ds_type), header=0, index_col=0)
+    df = df[~df['Name'].isna()]
+    df['Name'] = df['Name'].astype(str)
+    return df
+
+
+START = "<s>"   # Start-of-name token
+END = "</s>"    # End-of-name token
+UNK = "<unk>"   # token representing out of unknown (or out of vocabulary) tokens
+vocab_from_ascii = True
+
+vocab = None # vocabulary of the corpus, shared by the models (see set_vocab)
+
+
+class Vocab(object):
+    """
+    Vocabulary mapping tokens to ids, with the interface of torchtext.vocab.Vocab
+    used by the models (indexing, calling on a list of tokens, get_stoi and get_itos)
+    """
+
+    def __init__(self, itos, default_index=None):
+        """
+        Args:
+            itos [list[str]]: tokens of the ids
+            default_index [int]: id returned for out of vocabulary tokens;
+                                 None raises a KeyError instead
+        """
+
+        self.itos = list(itos)
+        self.stoi = {token: i for i, token in enumerate(self.itos)}
+        self.default_index = default_index
+
+
+    def __len__(self):
+        return len(self.itos)
+
+
+    def __contains__(self, token):
+        return token in self.stoi
+
+
+    def __getitem__(self, token):
+        index = self.stoi.get(token, self.default_index)
+        if index is None:
+            raise KeyError(f"token {token!r} is not in the vocabulary and no default index is set")
+        return index
+
+
+    def __call__(self, tokens):
+        return self.lookup_indices(tokens)
+
+
+    def lookup_indices(self, tokens):
+        return [self[token] for token in tokens]
+
+
+    def lookup_token(self, index):
+        return self.itos[index]
+
+
+    def set_default_index(self, index):
+        self.default_index = index
+
+
+    def get_default_index(self):
+        return self.default_index
+
+
+    def get_stoi(self):
+        return self.stoi
+
+
+    def get_itos(self):
+        return self.itos
+
+
+def set_vocab(new_vocab):
+    """
+    Sets the vocabulary used by the models to map chars to ids
+    """
+
+    global vocab
+    vocab = new_vocab
+
+
+def get_vocab():
+    """
+    Returns the vocabulary set by set_vocab (which get_tokenised_text_and_vocab calls)
+    """
+
+    if vocab is None:
+        raise ValueError("no vocabulary is set; call get_tokenised_text_and_vocab or set_vocab first")
+    return vocab
+
+
+def build_vocab(names):
+    """
+    Builds a vocabulary given a list of names
+
+    Args:
+        names [list[str]]: list of names
+
+    Returns:
+        vocab [Vocab]: vocabulary based on the names
+
+    """
+
+    if vocab_from_ascii:
+        char_counts = {chr(i):i for i in range(128)}
+    else:
+        char_counts = Counter("".join(names))
+
+    # special tokens first, then the chars in sorted order (as torchtext orders tokens of equal frequency)
+    vocab = Vocab([UNK, START, END] + sorted(char_counts))
+    vocab.set_default_index(vocab[UNK])
+    return vocab
+
+
+def tokenize_name(name):
+    """
+    Tokenise the name i.e. break a name into list of characters
+
+    Args:
+        name [str]: name to be tokenized
+
+    Returns:
+        list of characters
+    """
+
+    return list(str(name))
+
+
+def process_data_for_input(data_iter, vocab):
+    """
+    Processes data for input: Breaks names into characters,
+    converts out of vocabulary tokens to UNK and
+    appends END token at the end of every name
+
+    Args:
+        data_iter: data iterator consisting of names
+        vocab: vocabulary
+
+    Returns:
+        data_iter [list[list[str]]]: list of names, where each name is a
+                                list of characters and is appended with
+                                START and END tokens
+
+    """
+
+    vocab_set = set(vocab.get_itos())
+    # convert Out Of Vocabulary (OOV) tokens to UNK tokens
+    data_iter = [[char if char in vocab_set else UNK
+                        for char in tokenize_name(name)] for name in data_iter]
+    data_iter = [[START] + name + [END] for name in data_iter]
+
+    return data_iter
+
+
+class EncodedCorpus(object):
+    """
+    Tokenised names stored as one contiguous array of vocab ids and an array of
+    offsets (CSR style): the ids of the i-th name are ids[offsets[i]:offsets[i+1]].
+    Ids are stored in the smallest integer type which fits the vocabulary.
+
+    The corpus can be used like the list of tokenised names of process_data_for_input:
+    indexing and iterating decode the names into lists of chars, while the n-gram
+    models read the ids directly (see get_corpus_ids).
+    """
+
+    def __init__(self, ids, offsets, itos):
+        """
+        Args:
+            ids [np.ndarray]: vocab ids of all the tokens, one name after the other
+            offsets [np.ndarray]: array of size number of names + 1 of the start of every name in ids
+            itos [list[str]]: chars of the vocab ids
+        """
+
+        self.ids = ids
+        self.offsets = offsets
+        self.itos = itos
+
+
+    @classmethod
+    def from_names(cls, names, vocab):
+        """
+        Encodes names, like process_data_for_input does: out of vocabulary chars become UNK
+        and every name is enclosed in START and END tokens
+
+        Args:
+            names: iterable of names
+            vocab: vocabulary
+
+        Returns:
+            EncodedCorpus
+        """
+
+        stoi = vocab.get_stoi()
+        itos = vocab.get_itos()
+        if hasattr(names, "astype"):
+            # pandas series of names
+            names = names.astype(str).tolist()
+        else:
+            names = [str(name) for name in names]
+        id_dtype = np.min_scalar_type(len(itos)-1)
+        unk_id = stoi[UNK]
+
+        char_table = cls.get_char_table(vocab)
+        if char_table is not None and names:
+            # the names are joined as NUL name NUL NUL name NUL ..., so that the NULs
+            # are alternately the START and END token of a name; the code point of
+            # every char is then mapped to its id through the table in a single lookup
+            text = "\0" + "\0\0".join(names) + "\0"
+            codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+            separators = np.flatnonzero(codes == 0)
+            if len(separators) == 2*len(names):
+                ids = char_table.astype(id_dtype).take(codes, mode="clip")
+                ids[separators[0::2]] = stoi[START]
+                ids[separators[1::2]] = stoi[END]
+                offsets = np.append(separators[0::2], len(ids))
+                return cls(ids, cls.narrow_offsets(offsets), itos)
+
+        lengths = np.fromiter((len(name)+2 for name in names), dtype=np.int64, count=len(names))
+        offsets = np.zeros(len(names)+1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        text = "".join(names)
+        chars = np.fromiter((stoi.get(char, unk_id) for char in text), dtype=id_dtype, count=len(text))
+
+        ids = np.empty(offsets[-1], dtype=id_dtype)
+        is_char = np.ones(len(ids), dtype=bool)
+        is_char[offsets[:-1]] = False
+        is_char[offsets[1:]-1] = False
+        ids[offsets[:-1]] = stoi[START]
+        ids[offsets[1:]-1] = stoi[END]
+        ids[is_char] = chars
+        return cls(ids, cls.narrow_offsets(offsets), itos)
+
+
+    @staticmethod
+    def get_char_table(vocab):
+        """
+        Builds the lookup table from the code points of chars to vocab ids,
+        e.g. for the ASCII vocabulary of vocab_from_ascii
+
+        Args:
+            vocab: vocabulary
+
+        Returns:
+            char_table [np.ndarray]: array of 257 ids; char_table[c] is the id of the char
+                                     with code point c < 256, char_table[256] is the id of UNK.
+                                     None if the vocabulary has chars beyond code point 255.
+        """
+
+        stoi = vocab.get_stoi()
+        chars = [char for char in stoi if len(char) == 1]
+        if any(ord(char) > 255 for char in chars):
+            return None
+
+        char_table = np.full(257, stoi[UNK], dtype=np.int64)
+        for char in chars:
+            char_table[ord(char)] = stoi[char]
+        return char_table
+
+
+    @classmethod
+    def from_tokens(cls, corpus, vocab):
+        """
+        Encodes a list of tokenised names, e.g. the output of process_data_for_input
+        """
+
+        ids, offsets = get_corpus_ids(corpus)
+        itos = vocab.get_itos()
+        return cls(ids.astype(np.min_scalar_type(len(itos)-1)), cls.narrow_offsets(offsets), itos)
+
+
+    @classmethod
+    def concatenate(cls, corpora, itos):
+        """
+        Joins encoded corpora into one, keeping the order of the names
+
+        Args:
+            corpora [list[EncodedCorpus]]: corpora encoded with the same vocabulary
+            itos [list[str]]: chars of the vocab ids
+
+        Returns:
+            EncodedCorpus
+        """
+
+        ids = [corpus.ids for corpus in corpora]
+        offsets = [np.zeros(1, dtype=np.int64)]
+        for corpus in corpora:
+            offsets.append(corpus.offsets[1:].astype(np.int64) + offsets[-1][-1])
+        id_dtype = np.min_scalar_type(len(itos)-1)
+        ids = np.concatenate(ids).astype(id_dtype) if ids else np.zeros(0, dtype=id_dtype)
+        return cls(ids, cls.narrow_offsets(np.concatenate(offsets)), itos)
+
+
+    @staticmethod
+    def narrow_offsets(offsets):
+        return offsets.astype(np.int32) if offsets[-1] < 2**31 else offsets
+
+
+    def get_ids(self, i):
+        """
+        Returns the vocab ids of the i-th name
+        """
+
+        return self.ids[self.offsets[i]:self.offsets[i+1]]
+
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError("EncodedCorpus only supports contiguous slices")
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop+1]
+            return EncodedCorpus(self.ids[offsets[0]:offsets[-1]], offsets - offsets[0], self.itos)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("corpus index out of range")
+        return [self.itos[j] for j in self.get_ids(i).tolist()]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.offsets.nbytes
+
+
+def hash_file(path, block_size=1 << 20):
+    """
+    Returns the sha256 hex digest of the content of a file, read block by block
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_vocab_from_itos(itos):
+    """
+    Rebuilds a vocabulary with exactly the ids of itos, e.g. the one of a cached corpus
+
+    Args:
+        itos [list[str]]: chars of the vocab ids
+
+    Returns:
+        vocab [Vocab]
+    """
+
+    vocab = Vocab(itos)
+    vocab.set_default_index(vocab[UNK])
+    return vocab
+
+
+def get_tokenised_text_and_vocab(ds_type, vocab=None):
+    """
+    Reads input data, tokenizes it, builds vocabulary (if unspecified)
+    and outputs tokenised list of names (which in turn is a list of characters).
+    The encoded names are cached in get_corpus_cache_dir() (unless CORPUS_CACHE is
+    False), keyed by the content of the csv file and the vocabulary, so that later
+    runs skip parsing and tokenizing.
+
+    The returned vocabulary also becomes the global vocabulary of the models
+    (set_vocab), like the vocab variable of the notebook, which the models read.
+
+    Args:
+        ds_type [str]: Type of the dataset (e.g., train, validation, test)
+        vocab [Vocab]: vocabulary;
+                                 If vocab is None, the function will
+                                 build the vocabulary from input text.
+                                 If vocab is provided, it will tokenize name
+                                 according to the vocab, replacing any tokens
+                                 not part of the vocab with UNK token.
+
+    Returns:
+        data_iter [EncodedCorpus]: tokenized names, encoded as vocab ids
+        vocab: vocabulary, also set with set_vocab
+
+    """
+
+    # reuse the corpus encoded by a previous run from the same file, if it was cached
+    path = get_data_path(ds_type)
+    cache_dir = get_corpus_cache_dir() if CORPUS_CACHE else None
+    cache_path = None
+    if cache_dir is not None:
+        key = json.dumps([hash_file(path), CORPUS_CACHE_VERSION, vocab_from_ascii,
+                          None if vocab is None else vocab.get_itos()])
+        cache_path = os.path.join(cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".bin")
+        if os.path.exists(cache_path):
+            header, arrays = read_array_file(cache_path)
+            if vocab is None:
+                vocab = build_vocab_from_itos(header["itos"])
+            set_vocab(vocab)
+            return EncodedCorpus(arrays["ids"], arrays["offsets"], vocab.get_itos()), vocab
+
+    # read the 'Name' column of the csv file, chunk by chunk
+    chunks = read_names(ds_type)
+
+    # build vocab from input data, if vocab is unspecified
+    if vocab is None:
+        if vocab_from_ascii:
+            vocab = build_vocab([])
+        else:
+            chunks = [[name for chunk in chunks for name in chunk]]
+            vocab = build_vocab(chunks[0])
+
+    # convert OOV chars to UNK, append START and END token to each name
+    data_iter = EncodedCorpus.concatenate([EncodedCorpus.from_names(chunk, vocab) for chunk in chunks],
+                                          vocab.get_itos())
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file first, so that other processes never read a partial file
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        write_array_file(temporary_path, {"itos": vocab.get_itos(), "source": path},
+                         {"ids": data_iter.ids, "offsets": data_iter.offsets})
+        os.replace(temporary_path, cache_path)
+
+    set_vocab(vocab)
+    return data_iter, vocab
+
+
+def get_corpus_ids(corpus, vocab=None):
+    """
+    Converts a tokenised corpus into one flat array of vocab ids
+
+    Args:
+        corpus [list[list[str]] or EncodedCorpus]: list of tokenized names
+        vocab: vocabulary of the ids; defaults to get_vocab()
+
+    Returns:
+        ids [np.ndarray]: vocab ids of all the tokens in the corpus, one name after the other
+        offsets [np.ndarray]: array of size len(corpus)+1;
+                              ids[offsets[i]:offsets[i+1]] are the ids of the i-th name
+    """
+
+    if isinstance(corpus, EncodedCorpus):
+        return corpus.ids, corpus.offsets
+
+    lengths = np.fromiter((len(name) for name in corpus), dtype=np.int64, count=len(corpus))
+    offsets = np.zeros(len(lengths)+1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+
+    if vocab is None:
+        vocab = get_vocab()
+    stoi = vocab.get_stoi()
+    unk_id = vocab[UNK]
+    ids = np.fromiter((stoi.get(char, unk_id) for name in corpus for char in name),
+                      dtype=np.int64, count=offsets[-1])
+    return ids, offsets
@@ -0,0 +1,218 @@
+"""
+Evaluation of the language models, shared by the n-gram and the neural models.
+"""
+
+import numpy as np
+
+from names_lm.data import get_vocab
+from names_lm.profiling import profile_model, profile_phase
+
+
+VALIDITY_BATCH_SIZE = 4096 # number of distributions checked at once by check_validity_of_table
+VALIDITY_MESSAGES = {
+    "negative": "Negative value in probabilities",
+    "larger_than_one": "Value larger than 1 in probabilities",
+    "not_normalized": "probabilities do not sum to 1",
+} # messages of validate_probability_distribution for the checks of validate_probability_table
+
+
+## Please do not change anything in this code block.
+
+def check_validity(model, ngram, is_neural):
+    """
+    Checks if get_next_char_probabilities returns a valid probability distribution
+    """
+
+    if ngram==1 or is_neural:
+        P = model.get_next_char_probabilities()
+        is_valid = validate_probability_distribution(P.values())
+        if not is_valid:
+            return is_valid
+
+    elif ngram==2:
+        P = model.get_next_char_probabilities()
+        for char1 in P.keys():
+            is_valid = validate_probability_distribution(list(P[char1].values()))
+            if not is_valid:
+                return is_valid
+
+    elif ngram==3:
+        P = model.get_next_char_probabilities()
+        for char1 in P.keys():
+            for char2 in P[char1].keys():
+                is_valid = validate_probability_distribution(list(P[char1][char2].values()))
+                if not is_valid:
+                    return is_valid
+    else:
+        print("Enter a valid number for ngram")
+
+    return True
+
+
+def validate_probability_distribution(probs):
+    """
+    Checks if probs is a valid probability distribution
+    """
+    if not min(probs) >= 0:
+        print("Negative value in probabilities")
+        return False
+    elif not max(probs) <= 1 + 1e-8:
+        print("Value larger than 1 in probabilities")
+        return False
+    elif not abs(sum(probs)-1) < 1e-4:
+        print("probabilities do not sum to 1")
+        return False
+    return True
+
+
+def check_validity_of_table(model, ngram, is_neural):
+    """
+    Checks the distributions of an n-gram model all at once, as the rows of
+    get_next_char_distribution for the contexts of get_distribution_contexts,
+    without building the dictionaries of get_next_char_probabilities.
+    This checks the arrays the dictionaries are built from, not the dictionaries
+    themselves; models without such a table (e.g. the neural models) are checked
+    with check_validity.
+    """
+
+    if is_neural or not hasattr(model, "get_distribution_contexts"):
+        return check_validity(model, ngram, is_neural)
+
+    contexts = model.get_distribution_contexts()
+    invalid = {}
+    for start in range(0, len(contexts), VALIDITY_BATCH_SIZE):
+        batch = contexts[start:start+VALIDITY_BATCH_SIZE]
+        for reason, rows in validate_probability_table(model.get_next_char_distribution(batch)).items():
+            invalid.setdefault(reason, []).append(batch[rows])
+
+    for reason, context_keys in invalid.items():
+        context_keys = np.concatenate(context_keys)
+        names = ", ".join(repr("".join(chars)) for chars in get_context_chars(context_keys[:5], model.n))
+        more = f" and {len(context_keys)-5} more" if len(context_keys) > 5 else ""
+        print(f"{VALIDITY_MESSAGES[reason]} after the contexts {names}{more}")
+    return not invalid
+
+
+def validate_probability_table(probs, tolerance=1e-4):
+    """
+    Vectorized validate_probability_distribution, over the rows of a table
+
+    Args:
+        probs [np.ndarray]: array of shape number of contexts x |V| of distributions
+        tolerance [float]: largest difference between the sum of a distribution and 1
+
+    Returns:
+        invalid [dict]: indices of the rows failing each check, keyed by "negative",
+                        "larger_than_one" and "not_normalized"; empty if every row is valid
+    """
+
+    checks = {
+        "negative": ~(probs.min(axis=1) >= 0),
+        "larger_than_one": ~(probs.max(axis=1) <= 1 + 1e-8),
+        "not_normalized": ~(np.abs(probs.sum(axis=1) - 1) < tolerance),
+    }
+    return {reason: np.flatnonzero(failed) for reason, failed in checks.items() if failed.any()}
+
+
+def get_context_chars(context_keys, n):
+    """
+    Unpacks context keys of n-1 chars (see get_context_key) into lists of chars
+    """
+
+    itos = get_vocab().get_itos()
+    V = len(itos)
+    return [[itos[(key // V**i) % V] for i in reversed(range(n-1))] for key in context_keys]
+
+
+def eval_ngram_model(model, ngram, ds, ds_name, eval_prefixes, eval_sequences, num_names=5, is_neural=False,
+                     check_table=False, profiler=None):
+    """
+    Runs the following evaluations on n-gram models:
+    (1) checks if probability distribution returned by model.get_next_char_probabilities() sums to one
+    (2) checks the perplexity of the model
+    (3) generates names using model.generate_names()
+    (4) generates names given a prefix using model.generate_names()
+    (4) output most likely characters after a given sequence of chars using model.get_most_likely_chars()
+
+    If check_table is set, (1) checks the distributions of the n-gram models as
+    one table with check_validity_of_table, which is faster for large models but
+    does not build the dictionaries of get_next_char_probabilities.
+
+    If profiler (an EvalProfiler) is given, each of these phases, and the model
+    methods called in it, are measured and sent to the sink of the profiler.
+    """
+
+    validity_check = check_validity_of_table if check_table else check_validity
+    with profile_model(profiler, model):
+        # (1) checks if probability distributions sum to one
+        with profile_phase(profiler, "check_validity"):
+            is_valid = validity_check(model=model, ngram=ngram, is_neural=is_neural)
+            print(f'EVALUATION probability distribution is valid: {is_valid}')
+
+        # (2) evaluate the perplexity of the model on the dataset
+        with profile_phase(profiler, "perplexity"):
+            print(f'EVALUATION of {ngram}-gram on {ds_name} perplexity:',
+                model.get_perplexity(ds))
+
+        # (3) generate a few names
+        with profile_phase(profiler, "generate_names"):
+            generated_names = ", ".join(model.generate_names(k=num_names))
+            print(f'EVALUATION {ngram}-gram generated names are {generated_names}')
+
+        # (4) generate a few names given a prefix
+        with profile_phase(profiler, "generate_names_with_prefix"):
+            for prefix in eval_prefixes:
+                generated_names_with_prefix = ", ".join(model.generate_names(k=num_names, prefix=prefix))
+                prefix = ''.join(prefix)
+                print(f'EVALUATION {ngram}-gram generated names with prefix {prefix} are {generated_names_with_prefix}')
+
+        # (5) get most likely characters after a sequence
+        with profile_phase(profiler, "most_likely_chars"):
+            for sequence in eval_sequences:
+                most_likely_chars = ", ".join(model.get_most_likely_chars(sequence=sequence, k=num_names))
+                sequence = "".join(sequence)
+                print(f"EVALUATION {ngram}-gram top most likely chars after {sequence} are {most_likely_chars}")
+
+
+def eval_rnn_model(model, ds, ds_name, eval_prefixes, eval_sequences, num_names=5, max_name_length=15, profiler=None):
+    """
+    Runs the following evaluations on n-gram models:
+    (1) checks if probability distribution returned by model.get_next_char_probabilities() sums to one
+    (2) checks the perplexity of the model
+    (3) generates names using model.generate_names()
+    (4) generates names given a prefix using model.generate_names()
+    (4) output most likely characters after a given sequence of chars using model.get_most_likely_chars()
+
+    If profiler (an EvalProfiler) is given, each of these phases, and the model
+    methods called in it, are measured and sent to the sink of the profiler.
+    """
+
+    with profile_model(profiler, model):
+        # (1) checks if probability distributions sum to one
+        with profile_phase(profiler, "check_validity"):
+            is_valid = check_validity(model, 1, True)
+            print(f'EVALUATION probability distribution is valid: {is_valid}')
+
+        # (2) evaluate the perplexity of the model on the dataset
+        with profile_phase(profiler, "perplexity"):
+            print(f'EVALUATION of RNN on {ds_name} perplexity:',
+                model.get_perplexity(ds))
+
+        # (3) generate a few names
+        with profile_phase(profiler, "generate_names"):
+            generated_names = ", ".join(model.generate_names(k=num_names, n=max_name_length))
+            print(f'EVALUATION RNN generated names are {generated_names}')
+
+        # (4) generate a few names given a prefix
+        with profile_phase(profiler, "generate_names_with_prefix"):
+            for prefix in eval_prefixes:
+                generated_names_with_prefix = ", ".join(model.generate_names(k=num_names, n=max_name_length, prefix=prefix))
+                prefix = ''.join(prefix)
+                print(f'EVALUATION RNN generated names with prefix {prefix} are {generated_names_with_prefix}')
+
+        # (5) get most likely characters after a sequence
+        with profile_phase(profiler, "most_likely_chars"):
+            for sequence in eval_sequences:
+                most_likely_chars = ", ".join(model.get_most_likely_chars(sequence=sequence, k=num_names))
+                sequence = "".join(sequence)
+                print(f"EVALUATION RNN the top most likely chars after {sequence} are {most_likely_chars}")
@@ -0,0 +1,1066 @@
+"""
+Neural language models: the feed-forward neural n-gram model and the RNN model,
+with their trainers and data loaders.
+
+This module imports torch, so it is only loaded when a neural model is used
+(see names_lm.__getattr__); matplotlib is only imported to plot the losses.
+"""
+
+import os
+import json
+from functools import partial
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+from names_lm.data import START, END, get_vocab, get_corpus_ids
+from names_lm.ngram import LRUCache
+
+
+MAX_NAME_LENGTH = 8 # maximum length of the names generated by NeuralNGramTrainer by default
+USE_CUDA = torch.cuda.is_available() # the data loaders pin their batches in memory if a gpu is available
+DATALOADER_WORKERS = 0 # number of processes preparing the batches; 0 prepares them in the training process
+PREFETCH_FACTOR = 2 # number of batches prepared in advance by every worker
+PERSISTENT_WORKERS = False # keep the worker processes alive between epochs
+FNN_CACHE_SIZE = 4096 # number of contexts whose distribution is cached by NeuralNGramTrainer with cache_distributions
+PERPLEXITY_BATCH_SIZE = 8192 # number of ngrams scored per forward pass by NeuralNGramTrainer.get_perplexity
+ENCODED_TEXTS_CACHED = 2 # number of texts whose encoded ngrams are kept by NeuralNGramTrainer (e.g. train and valid); 0 disables it
+
+
+def move_to_device(batch, device):
+    """
+    Moves a batch (a tensor, or a list or tuple of them) to a device.
+    Copies from pinned memory to the gpu do not block the training process.
+    """
+
+    if isinstance(batch, torch.Tensor):
+        return batch.to(device, non_blocking=True)
+    return type(batch)(move_to_device(x, device) for x in batch)
+
+
+def get_loader_options(num_workers, prefetch_factor, persistent_workers, pin_memory):
+    """
+    Returns the keyword arguments of a DataLoader for its worker processes
+
+    Args:
+        num_workers [int]: number of worker processes; defaults to DATALOADER_WORKERS
+        prefetch_factor [int]: batches prepared in advance by every worker; defaults to PREFETCH_FACTOR
+        persistent_workers [bool]: keep the workers between epochs; defaults to PERSISTENT_WORKERS
+        pin_memory [bool]: pin the batches in memory; defaults to USE_CUDA
+    """
+
+    options = {"num_workers": DATALOADER_WORKERS if num_workers is None else num_workers,
+               "pin_memory": USE_CUDA if pin_memory is None else pin_memory}
+    # torch only accepts these options with worker processes
+    if options["num_workers"] > 0:
+        options["prefetch_factor"] = PREFETCH_FACTOR if prefetch_factor is None else prefetch_factor
+        options["persistent_workers"] = PERSISTENT_WORKERS if persistent_workers is None else persistent_workers
+    return options
+
+
+def collate_ngram(batch, text_pipeline):
+    """
+    Converts the text in the batch to tokens
+    and maps the tokens to indices in the vocab.
+    The text in the batch is a list of ngrams
+    i.e. if N=3, then text contains 3 tokens in a list
+    and batch is a list of such texts.
+
+    Returns:
+        batch_input [pytorch tensor]:
+            input for n-gram model with size batch_size*(ngram-1)
+        batch_output [pytorch tensor]:
+            output for n-gram model with size batch_size
+    """
+
+    batch_input, batch_output = [], []
+
+    # Process each text in the batch
+    for text in batch:
+        token_id_sequence = text_pipeline(text)
+        # last token is the output, and
+        #  pervious ngram-1 tokens are inputs
+        output = token_id_sequence.pop()
+        input = token_id_sequence
+        batch_input.append(input)
+        batch_output.append(output)
+
+    # Convert lists to PyTorch tensors; the trainer moves them to the gpu (if using)
+    batch_input = torch.tensor(batch_input, dtype=torch.long)
+    batch_output = torch.tensor(batch_output, dtype=torch.long)
+
+    return batch_input, batch_output
+
+
+class NGramWindowDataset(Dataset):
+    """
+    Dataset of the ngrams of a corpus for the neural n-gram model.
+
+    The corpus is encoded once into a tensor of vocab ids, where every name is
+    padded with START tokens like get_dataloader pads it; the ngrams are the
+    windows of a strided (unfold) view of this tensor which do not cross two
+    names. Indexing the dataset with a tensor of window indices returns the
+    whole batch of inputs and outputs, without any python work per ngram.
+    """
+
+    def __init__(self, input_text, vocab, ngram):
+        """
+        Args:
+            input_text [list[list[str]] or EncodedCorpus]: list of tokenised names
+            vocab: vocabulary of the corpus
+            ngram [int]: length of the ngrams
+        """
+
+        ids, offsets = get_corpus_ids(input_text, vocab)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        start_id = vocab[START]
+
+        # names starting with START get ngram-2 more, the others ngram-1
+        starts_with_start = np.zeros(len(lengths), dtype=bool)
+        starts_with_start[lengths > 0] = ids[offsets[:-1][lengths > 0]] == start_id
+        pads = np.maximum(np.where(starts_with_start, ngram-2, ngram-1), 0)
+        padded_offsets = np.zeros(len(lengths)+1, dtype=np.int64)
+        np.cumsum(lengths + pads, out=padded_offsets[1:])
+
+        padded = np.full(padded_offsets[-1], start_id, dtype=np.int64)
+        shift = np.repeat(padded_offsets[:-1] + pads - offsets[:-1], lengths)
+        padded[np.arange(len(ids)) + shift] = ids
+
+        # the windows of a name start at its first padded token and end at its last token
+        counts = np.maximum(lengths + pads - ngram + 1, 0)
+        window_offsets = np.zeros(len(counts)+1, dtype=np.int64)
+        np.cumsum(counts, out=window_offsets[1:])
+        starts = np.arange(window_offsets[-1]) + np.repeat(padded_offsets[:-1] - window_offsets[:-1], counts)
+
+        self.ngram = ngram
+        self.tokens = torch.from_numpy(padded)
+        self.starts = torch.from_numpy(starts)
+        self.windows = self.tokens.unfold(0, ngram, 1) if len(padded) >= ngram else self.tokens.new_zeros((0, ngram))
+
+
+    def __len__(self):
+        return len(self.starts)
+
+
+    def __getitem__(self, indices):
+        """
+        Args:
+            indices [torch.Tensor]: indices of the ngrams of a batch
+
+        Returns:
+            batch_input [pytorch tensor]: size batch_size*(ngram-1)
+            batch_output [pytorch tensor]: size batch_size
+        """
+
+        batch = self.windows[self.starts[indices]]
+        return batch[:, :-1], batch[:, -1]
+
+
+class BatchIndexSampler(Sampler):
+    """
+    Sampler of whole batches: yields tensors of batch_size indices, sliced from a
+    random permutation of the dataset (or from the ordered indices)
+    """
+
+    def __init__(self, num_samples, batch_size, shuffle):
+        self.num_samples = num_samples
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+
+    def __len__(self):
+        return (self.num_samples + self.batch_size - 1) // self.batch_size
+
+
+    def __iter__(self):
+        if self.shuffle:
+            indices = torch.randperm(self.num_samples)
+        else:
+            indices = torch.arange(self.num_samples)
+        for start in range(0, self.num_samples, self.batch_size):
+            yield indices[start:start+self.batch_size]
+
+
+def get_dataloader(input_text, vocab, ngram, batch_size, shuffle, num_workers=None,
+                   prefetch_factor=None, persistent_workers=None, pin_memory=None):
+    """
+    Creates a dataloader for the n-gram model which
+    takes in a list of list of tokens, appends the START token
+    at the starting of each text, and converts text into ngrams.
+
+    Example: For a trigram model, the list of characters are
+        ["n", "a", "v", "r"]
+    will be converted into lists
+        ["n", "a", "v"], ["a", "v", "r"]
+
+    For each ngram, first ngram-1 tokens are input and last token
+    is the output. Each token is converted into a index in the vocab.
+    The dataloader generates a batch of input, output pairs as
+    pytorch tensors.
+
+    The ngrams are served by NGramWindowDataset, which encodes the text once;
+    collate_ngram is not used any more.
+
+    Args:
+        input_text [list[list[str]] or EncodedCorpus]: list of list of tokens
+        vocab: vocabulary of the corpus
+        num_workers, prefetch_factor, persistent_workers, pin_memory: see get_loader_options
+    """
+
+    dataset = NGramWindowDataset(input_text, vocab, ngram)
+
+    # creates a DataLoader for the dataset; the sampler yields whole batches
+    # of indices, so the automatic batching of the DataLoader is disabled
+
+    """
+    dataloader documentation
+    https://pytorch.org/docs/stable/data.html#torch.utils.data.DataLoader
+    """
+
+    dataloader = DataLoader(
+        dataset,
+        batch_size=None,
+        sampler=BatchIndexSampler(len(dataset), batch_size, shuffle),
+        **get_loader_options(num_workers, prefetch_factor, persistent_workers, pin_memory),
+        )
+    return dataloader
+
+
+"""
+Implemenation of a PyTorch Module that holds the neural network for your model
+
+"""
+class FNN_LM(nn.Module):
+
+    def __init__(self, vocab_size, emb_size, hid_size, ngram):
+        super(FNN_LM, self).__init__()
+        self.ngram = ngram
+
+        # YOUR CODE HERE
+        # BEGIN CODE
+        self.emb_size = emb_size
+        self.embedding_layer = nn.Embedding(vocab_size,emb_size)
+        self.linear1 = nn.Linear((ngram-1)*emb_size,hid_size)
+        self.linear2 = nn.Linear(hid_size,vocab_size,bias=False)
+        self.linear3 = nn.Linear((ngram-1)*emb_size,vocab_size)
+        # END CODE
+
+
+    def forward(self, chars):
+        """
+        Args:
+            chars: this is a tensor of inputs with shape [batch_size x ngram-1]
+
+        Returns:
+            logits: a tensor of log probabilities with shape [batch_size x vocab_size]
+
+        """
+
+        # YOUR CODE HERE
+        # BEGIN CODE
+        X = self.embedding_layer(chars).view(-1,(self.ngram-1)*self.emb_size)
+        logits = self.linear3(X)+self.linear2(torch.tanh(self.linear1(X)))
+        # END CODE
+        return logits
+
+
+class NeuralNGramTrainer:
+    """
+    NeuralNGramTrainer wraps FNN_LM to handle training and evaluation.
+
+    """
+
+    # NOTE: you are free to add additional inputs/functions
+    # to NeuralNGramTrainer to make training better
+    # make sure to define and add it within the input
+    # and initialization if you are using any additional inputs
+    # for usage in the function
+
+    def __init__(
+        self,
+        ngram,
+        model,
+        optimizer,
+        criterion,
+        train_dataloader,
+        valid_dataloader,
+        epochs,
+        use_cuda,
+        vocab,
+        model_dir,
+        cache_distributions=False,
+        cache_size=FNN_CACHE_SIZE
+    ):
+        """
+        Args:
+            cache_distributions [bool]: keep the distributions computed by get_most_likely_chars
+                                        and get_next_char_probabilities in an LRU cache keyed
+                                        by the context, which is emptied whenever the weights
+                                        of the model change (generate_names runs batched
+                                        forward passes instead)
+            cache_size [int]: number of distributions cached; None for an unbounded cache
+        """
+
+        self.ngram = ngram
+        self.model = model
+        self.epochs = epochs
+        self.optimizer = optimizer
+        self.criterion = criterion
+        self.train_dataloader = train_dataloader
+        self.valid_dataloader = valid_dataloader
+        self.use_cuda = use_cuda
+        self.model_dir = model_dir
+        self.loss = {"train": [], "val": []}
+        self.val_loss_count = []
+        self.vocab = vocab
+        self.distribution_cache = LRUCache(cache_size) if cache_distributions else None
+        self.weights_updates = 0
+        self.cache_weights_version = None
+        self.cache_invalidations = 0
+        self.encoded_texts = LRUCache(ENCODED_TEXTS_CACHED)
+
+        # Move the model to GPU if available; the batches are moved by to_device
+        self.device = torch.device("cuda" if self.use_cuda else "cpu")
+        if self.use_cuda:
+            self.model = self.model.cuda()
+
+
+    def get_weights_version(self):
+        """
+        Returns a key which changes whenever the model or its weights are changed:
+        the number of optimizer steps taken by train_batch, and the version counters
+        torch increments on every in-place update of a parameter (optimizer steps
+        outside train_batch, load_state_dict, ...). Parameter._version is internal to
+        torch, hence the explicit count of the steps. Replacing param.data changes
+        neither; call clear_cache after doing so.
+        """
+
+        return (id(self.model), self.weights_updates) + tuple(param._version for param in self.model.parameters())
+
+
+    def compute_distribution(self, context_ids):
+        """
+        Returns the distribution of the char following a context, computed by the model
+
+        Args:
+            context_ids [tuple[int]]: ids of the last ngram-1 tokens
+
+        Returns:
+            probabilities of the chars indexed by their ids [np.ndarray]
+        """
+
+        token_ids = torch.tensor([context_ids], dtype=torch.long, device=self.device)
+        with torch.no_grad():
+            probs = torch.softmax(self.model(token_ids), dim=1)[0]
+        return probs.cpu().numpy()
+
+
+    def get_context_distribution(self, context):
+        """
+        Returns the distribution of the char following a context, read from the
+        cache of distributions if cache_distributions is set.
+        The cached arrays are shared, so they are read-only.
+
+        Args:
+            context [list[str]]: the last ngram-1 tokens
+
+        Returns:
+            probabilities of the chars indexed by their ids [np.ndarray]
+        """
+
+        context_ids = tuple(self.vocab.lookup_indices(list(context)))
+        if self.distribution_cache is None:
+            return self.compute_distribution(context_ids)
+
+        version = self.get_weights_version()
+        if version != self.cache_weights_version:
+            if len(self.distribution_cache) > 0:
+                self.cache_invalidations += 1
+            self.distribution_cache.clear()
+            self.cache_weights_version = version
+
+        probs = self.distribution_cache.get(context_ids)
+        if probs is None:
+            probs = self.compute_distribution(context_ids)
+            probs.setflags(write=False)
+            self.distribution_cache.put(context_ids, probs)
+        return probs
+
+
+    def get_cache_stats(self):
+        """
+        Returns the statistics of the cache of distributions, or None if it is disabled
+
+        Returns:
+            dictionary with the number of hits, misses, cached contexts, maximum size,
+            and of invalidations (clearing of the cache after the weights changed)
+        """
+
+        cache = self.distribution_cache
+        if cache is None:
+            return None
+        return {"hits": cache.hits, "misses": cache.misses, "size": len(cache),
+                "maxsize": cache.maxsize, "invalidations": self.cache_invalidations}
+
+
+    def clear_cache(self):
+        """
+        Empties the cache of distributions and resets its statistics, and drops the
+        encoded texts of get_encoded_ngrams (and the references to the texts)
+        """
+
+        if self.distribution_cache is not None:
+            self.distribution_cache.clear()
+            self.distribution_cache.hits = self.distribution_cache.misses = 0
+        self.cache_weights_version = None
+        self.cache_invalidations = 0
+        self.encoded_texts.clear()
+
+
+    def get_encoded_ngrams(self, text):
+        """
+        Returns the ngrams of a text encoded on the device of the model: the padded
+        token ids of NGramWindowDataset and the start of every ngram in them.
+        The encodings of the last ENCODED_TEXTS_CACHED texts are kept, keyed by the
+        identity of the text, and keep the texts alive until they are evicted or
+        clear_cache is called; call clear_cache after modifying a scored text in place.
+
+        Args:
+            text [list[list[str]] or EncodedCorpus]: list of tokenised names
+
+        Returns:
+            tokens [torch.Tensor]: padded vocab ids of all the names
+            starts [torch.Tensor]: index in tokens of the first id of every ngram
+        """
+
+        key = (id(text), len(text))
+        entry = self.encoded_texts.get(key)
+        if entry is None or entry[0] is not text:
+            dataset = NGramWindowDataset(text, self.vocab, self.ngram)
+            entry = (text, dataset.tokens.to(self.device), dataset.starts.to(self.device))
+            self.encoded_texts.put(key, entry)
+        return entry[1], entry[2]
+
+
+    def train(self):
+        """
+        Trains the model with train_dataloader and validates using valid_dataloader
+
+        """
+        # You may change the input arguments to this function,
+        # but make sure to also change the code wherever this function is called
+
+        # ADD YOUR CODE HERE
+        # FOR TRAINING & VALIDATION
+
+        for epoch in range(self.epochs):
+          self.model.train()
+          self.train_epoch(self.train_dataloader)
+          self.model.eval()
+          self.valid_epoch(self.valid_dataloader)
+          self.plot_losses()
+          print("train_loss:",self.loss["train"][-1])
+          print("validation_loss:",self.loss["val"][-1])
+
+
+    def train_epoch(self,dl):
+      for batch in dl:
+        self.train_batch(batch)
+
+    def valid_epoch(self,dl):
+        val_loss = 0
+        n =0
+        for batch in dl:
+          b = len(batch)
+          val_loss += b*self.valid_batch(batch)
+          n+=b
+        val_loss=val_loss/n
+        self.loss["val"].append(val_loss)
+        self.val_loss_count.append(len(self.loss["train"])-1)
+
+    def to_device(self, batch):
+        """
+        Moves a batch of the data loaders to the device of the model
+        """
+
+        return move_to_device(batch, self.device)
+
+    def train_batch(self,batch):
+        xb,yb = self.to_device(batch)
+        y_pred = self.model(xb)
+        loss = self.criterion(y_pred,yb)
+        loss.backward()
+        self.loss["train"].append(loss.detach().clone().cpu().item())
+        self.optimizer.step()
+        self.weights_updates += 1
+        if hasattr(self.optimizer,"sched"):self.optimizer.sched.step()
+        self.optimizer.zero_grad()
+
+    def valid_batch(self,batch):
+        xb,yb = self.to_device(batch)
+        with torch.no_grad():
+          y_pred = self.model(xb)
+          loss = self.criterion(y_pred,yb)
+        return loss.detach().clone().cpu().item()
+
+
+    def plot_losses(self):
+        """
+        Plots the training and validation losses
+        """
+        from matplotlib import pyplot as plt
+
+        plt.plot(self.loss['train'], label='train_ppl')
+        plt.plot(self.val_loss_count,self.loss['val'], label='val_ppl')
+        plt.legend()
+        plt.show()
+
+
+    def save_model(self):
+        """
+        Save final model to directory
+
+        """
+
+        model_path = os.path.join(self.model_dir, "model.pt")
+        torch.save(self.model, model_path)
+
+
+    def save_loss(self):
+        """
+        Save train/val loss as json file to the directory
+
+        """
+
+        loss_path = os.path.join(self.model_dir, "loss.json")
+        with open(loss_path, "w") as fp:
+            json.dump(self.loss, fp)
+
+
+    def get_next_char_probabilities(self):
+        """
+        Return a dictionary of probabilities for each char in the vocabulary
+        with a default starting sequence of [START]*(ngram-1)
+        Example:
+            If ngram=3, then default starting sequence for which
+            probabilities have to be returned is
+            [START, START]
+
+        Returns:
+            dictionary with key: char, value: probability
+
+        """
+
+        # ADD YOUR CODE HERE
+
+        # BEGIN CODE
+        self.model.eval()
+        probs = self.get_context_distribution([START]*(self.ngram-1))
+        itos = self.vocab.get_itos()
+        next_char_probabilities = dict()
+        for i in range(len(probs)):
+          next_char_probabilities[itos[i]]=probs[i]
+        # END CODE
+
+        return next_char_probabilities
+
+
+
+    def generate_names(self, k, n=MAX_NAME_LENGTH, prefix=None):
+        """
+        Given a prefix, generate k names according to the model.
+        The default prefix is None.
+
+        All k names are generated together: every step runs one forward pass over the
+        contexts of the unfinished names and samples their next chars on the device.
+
+        Args:
+            k [int]: Number of names to generate
+            n [int]: Maximum length (number of tokens) in the generated name
+            prefix [list of tokens]: Prefix after which the names have to be generated
+
+        Returns:
+            list of generated names [list[str]]
+        """
+
+        # ADD YOUR CODE HERE
+
+        # don't forget self.model.eval()
+        # BEGIN CODE
+        self.model.eval()
+        if prefix==None:prefix=[START]*(self.ngram-1)
+        if len(prefix)!=self.ngram-1:prefix = [START]*(self.ngram-1-len(prefix))+prefix
+        context_ids = self.vocab.lookup_indices(prefix[-(self.ngram-1):])
+        contexts = torch.tensor(context_ids,dtype=torch.long,device=self.device).repeat(k,1)
+        generated = torch.full((k,n),-1,dtype=torch.long,device=self.device)
+        active = torch.arange(k,device=self.device)
+        end_id = self.vocab[END]
+        with torch.no_grad():
+          for step in range(n):
+            if len(active)==0:break
+            probs = torch.softmax(self.model(contexts[active]),dim=1)
+            chars = torch.multinomial(probs,1).ravel()
+            not_end = chars!=end_id
+            active,chars = active[not_end],chars[not_end]
+            generated[active,step] = chars
+            contexts[active] = torch.cat([contexts[active,1:],chars[:,None]],dim=1)
+        itos = self.vocab.get_itos()
+        prefix = "".join(prefix)
+        names = [prefix+"".join(itos[i] for i in name if i>=0) for name in generated.cpu().tolist()]
+        # END CODE
+
+        return names
+
+
+    def get_perplexity(self, text):
+        """
+        Returns the perplexity of the model on text as a float.
+
+        The ngrams of the text are encoded once (see get_encoded_ngrams) and scored
+        on the device in batches of PERPLEXITY_BATCH_SIZE: the cross entropy of every
+        ngram (a log-softmax, so rare chars keep their precision) is summed in float64,
+        and only the total is copied back from the device.
+
+        Args:
+            text [list[list[str]]]: list of tokenised names
+            > Example:
+            [['<s>', 'a', 'a', 'b', 'i', 'd', '</s>'],
+            ['<s>', 'a', 'a', 'b', 'i', 'd', 'a', '</s>']]
+
+        Returns:
+            perplexity [float]
+
+        """
+
+        # ADD YOUR CODE HERE
+
+        # you may want to use the dataloader here
+        # don't forget self.model.eval()
+        # BEGIN CODE
+        self.model.eval()
+        tokens,starts = self.get_encoded_ngrams(text)
+        window = torch.arange(self.ngram,device=self.device)
+        entropy = torch.zeros((),dtype=torch.float64,device=self.device)
+        with torch.no_grad():
+          for i in range(0,len(starts),PERPLEXITY_BATCH_SIZE):
+            batch = tokens[starts[i:i+PERPLEXITY_BATCH_SIZE,None]+window]
+            logits = self.model(batch[:,:-1])
+            entropy += F.cross_entropy(logits,batch[:,-1],reduction="none").double().sum()
+        entropy = entropy/len(starts)
+        perplexity = torch.exp(entropy).item()
+
+
+        # END CODE
+
+
+        return perplexity
+
+
+    def get_most_likely_chars(self, sequence, k):
+        """
+        Given a sequence of characters, outputs k most likely characters after the sequence.
+
+        Args:
+            sequence [list[str]]: list of characters
+            k [int]: number of most likely characters to return
+
+        Returns:
+            chars [list[str]]: *Ordered* list of most likely characters
+                        (with charcater at index 0 being the most likely and
+                        character at index k-1 being the least likely)
+
+        """
+
+        # ADD YOUR CODE HERE
+        # don't forget self.model.eval()
+
+        # BEGIN CODE
+        self.model.eval()
+        itos = self.vocab.get_itos()
+        if len(sequence)!=self.ngram-1:sequence = [START]*(self.ngram-1-len(sequence))+sequence
+        probs = self.get_context_distribution(sequence[-(self.ngram-1):])
+        char_prob_pair = sorted(zip(itos,list(probs.ravel())),key=lambda x:x[1],reverse=True)
+        most_likely_chars = [c for c,_ in char_prob_pair[:k]]
+
+        # END CODE
+
+        return most_likely_chars
+
+
+"""
+Implemenation of a PyTorch Module that holds the RNN
+
+"""
+class RNN_LM(nn.Module):
+
+    # you may change the input arguments for __init__
+    def __init__(self,emb_dim,num_layers=1,dropout=0.0,vocab_size=None):
+        super(RNN_LM, self).__init__()
+
+        # YOUR CODE HERE
+        # BEGIN CODE
+        if vocab_size is None:
+            vocab_size = len(get_vocab())
+        self.emb_layer = nn.Embedding(vocab_size,emb_dim)
+        self.lstm = nn.LSTM(emb_dim,emb_dim,num_layers,batch_first=True,dropout=dropout)
+        # END CODE
+
+    def forward(self,X):
+        """
+          X is list of tensors which contains the token ids
+          example:
+            X=[torch.tensor([1,3,4]),torch.tensor([0,1])]
+        """
+        # YOUR CODE HERE
+        # BEGIN CODE
+        Y = []
+        for x in X:
+          x = self.emb_layer(x)
+          h,_ = self.lstm(x[None])
+          Y.append(h[0]@(self.emb_layer.weight.T))
+        # END CODE
+
+        return Y
+
+
+class RNNTrainer:
+    """
+    RNNTrainer wraps RNN_LM to handle training and evaluation.
+
+    """
+
+    # NOTE: you are free to add additional inputs/functions
+    # to RNNTrainer to make training better
+    # make sure to define and add it within the input
+    # and initialization if you are using any additional inputs
+    # for usage in the function
+
+    def __init__(
+        self,
+        model,
+        optimizer,
+        criterion,
+        train_dataloader,
+        valid_dataloader,
+        epochs,
+        use_cuda,
+        vocab,
+        model_dir
+    ):
+
+        self.model = model
+        self.epochs = epochs
+        self.optimizer = optimizer
+        self.criterion = criterion
+        self.train_dataloader = train_dataloader
+        self.valid_dataloader = valid_dataloader
+        self.use_cuda = use_cuda
+        self.model_dir = model_dir
+        self.loss = {"train": [], "val": []}
+        self.val_loss_count = []
+        self.vocab = vocab
+
+        # Move the model to GPU if available; the batches are moved by to_device
+        self.device = torch.device("cuda" if self.use_cuda else "cpu")
+        if self.use_cuda:
+            self.model = self.model.cuda()
+
+    def train(self):
+        """
+        Trains the model with train_dataloader and validates using valid_dataloader
+
+        """
+        # You may change the input arguments to this function,
+        # but make sure to also change the code wherever this function is called
+
+        # ADD YOUR CODE HERE
+        # FOR TRAINING & VALIDATION
+
+        for epoch in range(self.epochs):
+          self.model.train()
+          self.train_epoch(self.train_dataloader)
+          self.model.eval()
+          self.valid_epoch(self.valid_dataloader)
+          self.plot_losses()
+          print("epoch number:",epoch)
+          print("train_loss:",self.loss["train"][-1])
+          print("validation_loss:",self.loss["val"][-1])
+
+
+
+    def train_epoch(self,dl):
+      for batch in dl:
+        self.train_batch(batch)
+
+    def valid_epoch(self,dl):
+        val_loss = 0
+        n =0
+        for batch in dl:
+          b = len(batch)
+          val_loss += b*self.valid_batch(batch)
+          n+=b
+        val_loss=val_loss/n
+        self.loss["val"].append(val_loss)
+        self.val_loss_count.append(len(self.loss["train"])-1)
+
+    def to_device(self, batch):
+        """
+        Moves a batch of the data loaders to the device of the model
+        """
+
+        return move_to_device(batch, self.device)
+
+    def train_batch(self,batch):
+        xb,yb_list = self.to_device(batch)
+        y_pred_list = self.model(xb)
+        loss = 0
+        for y_pred,yb in zip(y_pred_list,yb_list):loss=loss+self.criterion(y_pred,yb)
+        loss = loss/len(yb_list)
+        loss.backward()
+        self.loss["train"].append(loss.detach().clone().cpu().item())
+        self.optimizer.step()
+        if hasattr(self.optimizer,"sched"):self.optimizer.sched.step()
+        self.optimizer.zero_grad()
+
+    def valid_batch(self,batch):
+        xb,yb_list = self.to_device(batch)
+        with torch.no_grad():
+          y_pred_list = self.model(xb)
+          loss = 0
+          for y_pred,yb in zip(y_pred_list,yb_list):loss=loss+self.criterion(y_pred,yb)
+          loss = loss/len(yb_list)
+        return loss.detach().clone().cpu().item()
+
+
+    def save_model(self):
+        """
+        Save final model to directory
+
+        """
+
+        model_path = os.path.join(self.model_dir, "model.pt")
+        torch.save(self.model, model_path)
+
+
+    def save_loss(self):
+        """
+        Save train/val loss as json file to the directory
+
+        """
+
+        loss_path = os.path.join(self.model_dir, "loss.json")
+        with open(loss_path, "w") as fp:
+            json.dump(self.loss, fp)
+
+    def plot_losses(self):
+        """
+        Plots the training and validation losses
+        """
+        from matplotlib import pyplot as plt
+
+        plt.plot(self.loss['train'], label='train_ppl')
+        plt.plot(self.val_loss_count,self.loss['val'], label='val_ppl')
+        plt.legend()
+        plt.show()
+
+
+    def get_next_char_probabilities(self):
+        """
+        Return a dictionary of probabilities for each char in the vocabulary
+        with a default starting sequence of [START]
+
+        Returns:
+            dictionary with key: char, value: probability
+
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        token_ids =  torch.tensor([self.vocab[START]],dtype=torch.long)
+        if self.use_cuda:token_ids = token_ids.cuda()
+        token_ids = [token_ids]
+        self.model.eval()
+        with torch.no_grad():
+          probs = torch.softmax(self.model(token_ids)[0],dim=1)[0]
+        itos = self.vocab.get_itos()
+        next_char_probabilities = dict()
+        for i in range(len(probs)):
+          next_char_probabilities[itos[i]]=probs[i]
+        # END CODE
+
+        return next_char_probabilities
+
+
+    def generate_names(self, k, n, prefix=None):
+        """
+        Given a prefix, generate k names according to the model.
+        The default prefix is None.
+
+        Args:
+            k [int]: Number of names to generate
+            n [int]: Maximum length (number of tokens) in the generated name
+            prefix [list of tokens]: Prefix after which the names have to be generated
+
+        Returns:
+            list of generated names [list[str]]
+        """
+
+        # ADD YOUR CODE HERE
+
+        # don't forget self.model.eval()
+        # BEGIN CODE
+        self.model.eval()
+        if prefix==None:prefix=[START]
+        if prefix[0]!=START:prefix=[START]+prefix
+        for i in range(len(prefix)):
+          if prefix[i]!=START:
+            prefix = prefix[i-1:].copy()
+            break
+        names = []
+        itos = self.vocab.get_itos()
+        for i in range(k):
+          name = prefix.copy()
+          name_length=0
+          while name_length<n:
+            token_ids = torch.tensor([self.vocab[c] for c in name],dtype=torch.long)
+            if self.use_cuda:token_ids = token_ids.cuda()
+            token_ids = [token_ids]
+            with torch.no_grad():
+              probs = torch.softmax(self.model(token_ids)[0][-1],dim=0)
+            if self.use_cuda:probs = probs.cpu()
+            probs = probs.numpy()
+            c =  itos[np.random.choice(len(probs),p=probs)]
+            if c==END:break
+            name.append(c)
+            name_length+=1
+          names.append("".join(name))
+        # END CODE
+
+        return names
+
+
+    def get_perplexity(self, text):
+        """
+        Returns the perplexity of the model on text as a float.
+
+        Args:
+            text [list[list[str]]]: list of tokenised names
+            > Example:
+            [['<s>', 'a', 'a', 'b', 'i', 'd', '</s>'],
+            ['<s>', 'a', 'a', 'b', 'i', 'd', 'a', '</s>']]
+
+        Returns:
+            perplexity [float]
+
+        """
+
+        # ADD YOUR CODE HERE
+
+        # you may want to use the dataloader here
+        # don't forget self.model.eval()
+        # BEGIN CODE
+        self.model.eval()
+        dl = get_dataloader_for_rnn(text,self.vocab,1,False)
+        entropy,n = 0,0
+        with torch.no_grad():
+          for batch in dl:
+            xb,yb_list = self.to_device(batch)
+            yb=yb_list[0]
+            logits = self.model(xb)[0]
+            probs = torch.softmax(logits,dim=1)[range(len(xb[0])),yb.ravel()]
+            if self.use_cuda:probs=probs.cpu()
+            probs = probs.numpy()
+            entropy-=np.sum(np.log(probs))
+            n+=len(xb[0])
+        entropy = entropy/n
+        perplexity = np.exp(entropy)
+
+
+        # END CODE
+
+        return perplexity
+
+
+    def get_most_likely_chars(self, sequence, k):
+        """
+        Given a sequence of characters, outputs k most likely characters after the sequence.
+
+        Args:
+            sequence [list[str]]: list of characters
+            k [int]: number of most likely characters to return
+
+        Returns:
+            chars [list[str]]: *Ordered* list of most likely characters
+                        (with charcater at index 0 being the most likely and
+                        character at index k-1 being the least likely)
+
+        """
+
+        # ADD YOUR CODE HERE
+
+        # don't forget self.model.eval()
+        # BEGIN CODE
+        self.model.eval()
+        itos = self.vocab.get_itos()
+        if sequence[0]!=START:sequence=[START]+sequence
+        for i in range(len(sequence)):
+          if sequence[i]!=START:
+            sequence = sequence[i-1:].copy()
+            break
+        token_ids = torch.tensor([self.vocab[c] for c in sequence],dtype=torch.long)
+        if self.use_cuda:token_ids = token_ids.cuda()
+        token_ids = [token_ids]
+        with torch.no_grad():
+          logits = self.model(token_ids)[0][-1]
+          probs = torch.softmax(logits,dim=0)
+          if self.use_cuda:probs=probs.cpu()
+          probs = probs.numpy()
+        char_prob_pair = sorted(zip(itos,list(probs.ravel())),key=lambda x:x[1],reverse=True)
+        most_likely_chars = [c for c,_ in char_prob_pair[:k]]
+
+        # END CODE
+
+        return most_likely_chars
+
+
+def collate_for_rnn(batch, text_pipeline):
+
+    batch_input, batch_output = [], []
+
+    # Process each text in the batch
+    for text in batch:
+        token_id_sequence = text_pipeline(text)
+        output = token_id_sequence[1:]
+        input = token_id_sequence[:-1]
+        batch_input.append(torch.tensor(input,dtype=torch.long))
+        batch_output.append(torch.tensor(output,dtype=torch.long))
+
+    return batch_input, batch_output
+
+
+def get_dataloader_for_rnn(input_text, vocab,batch_size, shuffle, num_workers=None,
+                           prefetch_factor=None, persistent_workers=None, pin_memory=None):
+    """
+    Creates a dataloader for the RNN model, whose batches are lists of the
+    input and output tensors of the names (see collate_for_rnn)
+
+    Args:
+        input_text [list[list[str]] or EncodedCorpus]: list of tokenised names
+        vocab: vocabulary of the corpus; it maps lists of tokens to ids when called
+        num_workers, prefetch_factor, persistent_workers, pin_memory: see get_loader_options
+    """
+
+    # the vocab is the text pipeline, so that the collate function can be
+    # pickled and sent to worker processes (a lambda can not)
+    dataloader = DataLoader(
+        input_text,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        collate_fn=partial(collate_for_rnn, text_pipeline=vocab),
+        **get_loader_options(num_workers, prefetch_factor, persistent_workers, pin_memory),
+        )
+    return dataloader
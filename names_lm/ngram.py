@@ -0,0 +1,2536 @@
+"""
+Character-level n-gram language models: counting, smoothing, sampling and
+saving of the unigram, bigram and trigram models.
+
+Only numpy is needed; the models read the vocabulary set in names_lm.data.
+"""
+
+import os
+import multiprocessing
+from collections import OrderedDict, defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from names_lm import data
+from names_lm.data import (START, END, get_vocab, set_vocab, get_corpus_ids,
+                           build_vocab_from_itos, read_array_file, write_array_file)
+
+
+MAX_NAME_LENGTH = 8 # maximum length of names for generation
+COUNT_WITH_ARRAYS = True # count n-grams over vocab ids with numpy arrays instead of nested dicts
+COUNT_WORKERS = 1 # number of processes counting n-grams with arrays; None uses all the cores
+
+
+MAX_DENSE_COUNTS = 1 << 22 # largest number of cells for which counts are stored in a dense array
+MIN_NAMES_PER_WORKER = 50000 # smallest shard of the corpus which is worth counting in its own process
+
+
+def get_ngram_keys(ids, offsets, ngram):
+    """
+    Packs every ngram of the corpus into a single integer key, written in base |V|
+    i.e. the ngram (c1, c2, c3) is stored as (c1*|V| + c2)*|V| + c3
+
+    Every token of a name, except the leading START token, is the last char of
+    exactly one ngram. Names are padded with START tokens, so the first chars
+    of a name also have n-1 prior chars.
+
+    Args:
+        ids [np.ndarray]: vocab ids of the corpus (see get_corpus_ids)
+        offsets [np.ndarray]: offsets of the names in ids (see get_corpus_ids)
+        ngram [int]: length of the ngrams
+
+    Returns:
+        keys [np.ndarray]: packed ngram keys, one for each token which is predicted
+    """
+
+    V = len(get_vocab())
+    if V**ngram >= 2**63:
+        raise ValueError(f"{ngram}-grams over a vocabulary of size {V} do not fit in 64-bit keys")
+
+    start_id = get_vocab()[START]
+    ids = np.asarray(ids, dtype=np.int64)
+    lengths = np.diff(offsets)
+    name_starts = offsets[:-1][lengths > 0]
+
+    # position of every token within its name
+    position = np.arange(len(ids), dtype=np.int64) - np.repeat(offsets[:-1], lengths)
+
+    # the leading START of a name is never predicted
+    is_target = np.ones(len(ids), dtype=bool)
+    is_target[name_starts[ids[name_starts] == start_id]] = False
+    targets = np.flatnonzero(is_target)
+    position = position[targets]
+
+    keys = np.zeros(len(targets), dtype=np.int64)
+    for j in range(ngram-1, 0, -1):
+        prior_chars = np.where(position >= j, ids[targets-j], start_id)
+        keys = keys*V + prior_chars
+    keys = keys*V + ids[targets]
+
+    return keys
+
+
+class CountTable(object):
+    """
+    Counts of ngrams stored in numpy arrays, indexed by vocab ids.
+    Dense tables hold an array of shape |V|x...x|V|, sparse tables hold the sorted
+    packed keys (see get_ngram_keys) of the observed ngrams and their counts.
+
+    The table can be read like the nested dictionaries of counts
+    Example:
+        > counts["c1"]["c2"] = 5
+    keys(), values() and items() only list the chars which have been observed.
+    Missing chars have a count of zero. The views of the first chars (counts["c1"])
+    are kept until the counts are added to, so that nested lookups in a loop build
+    every view once; the last lookup returns a plain int.
+    """
+
+    def __init__(self, counts, order, keys=None, base=0, itos=None, stoi=None):
+        """
+        Args:
+            counts [np.ndarray]: dense array of counts, or counts of the sparse keys
+            order [int]: number of chars in an ngram of the table
+            keys [np.ndarray]: sorted packed keys for a sparse table, None for a dense table
+            base [int]: packed value of the chars already indexed, for views of sparse tables
+        """
+
+        self.counts = counts
+        self.order = order
+        self.sparse_keys = keys
+        self.base = base
+        self.itos = get_vocab().get_itos() if itos is None else itos
+        self.stoi = get_vocab().get_stoi() if stoi is None else stoi
+        self.vocab_size = len(self.itos)
+        self.views = dict() # views of the first chars, by vocab id (see _get_by_id)
+        self.first_ids = None # ids of the observed first chars (see _observed_ids)
+
+
+    @classmethod
+    def from_keys(cls, keys, order, sparse=None, weights=None):
+        """
+        Counts packed ngram keys
+
+        Args:
+            keys [np.ndarray]: packed ngram keys (see get_ngram_keys)
+            order [int]: number of chars in an ngram
+            sparse [bool]: store the counts sparsely; by default, tables with
+                           more than MAX_DENSE_COUNTS cells are sparse
+            weights [np.ndarray]: count of each key, if the keys are not repeated once per ngram
+
+        Returns:
+            CountTable
+        """
+
+        V = len(get_vocab())
+        if sparse is None:
+            sparse = V**order > MAX_DENSE_COUNTS
+
+        if sparse:
+            if weights is None:
+                unique_keys, counts = np.unique(keys, return_counts=True)
+            else:
+                unique_keys, inverse = np.unique(keys, return_inverse=True)
+                counts = np.bincount(inverse, weights=weights, minlength=len(unique_keys))
+            return cls(counts.astype(np.int64), order, keys=unique_keys)
+
+        counts = np.bincount(keys, weights=weights, minlength=V**order).astype(np.int64)
+        return cls(counts.reshape((V,)*order), order)
+
+
+    @classmethod
+    def from_counts(cls, counts, order):
+        """
+        Returns counts as a CountTable, converting the nested dictionaries
+        of get_*_counts if needed
+
+        Args:
+            counts [CountTable or dict]: counts of ngrams
+            order [int]: number of chars in an ngram
+
+        Returns:
+            CountTable
+        """
+
+        if isinstance(counts, CountTable):
+            return counts
+
+        stoi = get_vocab().get_stoi()
+        V = len(stoi)
+        keys, values = [], []
+        def add_counts(counts, key, depth):
+            for char, value in counts.items():
+                if depth == 1:
+                    keys.append(key*V + stoi[char])
+                    values.append(value)
+                else:
+                    add_counts(value, key*V + stoi[char], depth-1)
+        add_counts(counts, 0, order)
+
+        keys = np.array(keys, dtype=np.int64)
+        values = np.array(values, dtype=np.int64)
+        if V**order > MAX_DENSE_COUNTS:
+            sort = np.argsort(keys)
+            return cls(values[sort], order, keys=keys[sort])
+
+        dense = np.zeros(V**order, dtype=np.int64)
+        dense[keys] = values
+        return cls(dense.reshape((V,)*order), order)
+
+
+    @property
+    def is_sparse(self):
+        return self.sparse_keys is not None
+
+
+    def lookup(self, keys):
+        """
+        Vectorized count lookup
+
+        Args:
+            keys [np.ndarray]: packed keys of ngrams of length self.order
+
+        Returns:
+            counts [np.ndarray]: counts of the ngrams
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        if not self.is_sparse:
+            return self.counts.reshape(-1)[keys]
+
+        if len(self.sparse_keys) == 0:
+            return np.zeros(len(keys), dtype=np.int64)
+        keys = keys + self.base
+        idx = np.minimum(np.searchsorted(self.sparse_keys, keys), len(self.sparse_keys)-1)
+        return np.where(self.sparse_keys[idx] == keys, self.counts[idx], 0)
+
+
+    def to_dense(self):
+        """
+        Returns the counts as a dense array of shape |V|x...x|V|
+        """
+
+        if not self.is_sparse:
+            return self.counts
+
+        dense = np.zeros(self.vocab_size**self.order, dtype=np.int64)
+        dense[self.sparse_keys - self.base] = self.counts
+        return dense.reshape((self.vocab_size,)*self.order)
+
+
+    def observed_keys(self):
+        """
+        Returns the packed keys of the ngrams with a non-zero count
+        """
+
+        if not self.is_sparse:
+            return np.flatnonzero(self.counts.reshape(-1))
+        return self.sparse_keys[self.counts > 0] - self.base
+
+
+    def add(self, counts):
+        """
+        Adds counts of ngrams of the same order to the table, in place
+
+        Args:
+            counts [CountTable or dict]: counts to add
+
+        Returns:
+            self
+        """
+
+        counts = CountTable.from_counts(counts, self.order)
+        keys = counts.observed_keys()
+        values = counts.lookup(keys)
+        self.views = dict()
+        self.first_ids = None
+
+        if not self.is_sparse:
+            np.add.at(self.counts.reshape(-1), keys, values)
+            return self
+
+        keys, inverse = np.unique(np.concatenate([self.sparse_keys - self.base, keys]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, values])).astype(np.int64)
+        self.sparse_keys = keys + self.base
+        return self
+
+
+    def get_context_totals(self):
+        """
+        Sums the counts over the last char of the ngrams
+
+        Returns:
+            CountTable of order self.order-1 with the total count of every context
+        """
+
+        V = self.vocab_size
+        if not self.is_sparse:
+            return CountTable(self.counts.sum(axis=-1), self.order-1, itos=self.itos, stoi=self.stoi)
+
+        contexts, first = np.unique(self.sparse_keys // V, return_index=True)
+        totals = np.add.reduceat(self.counts, first) if len(first) else self.counts[:0]
+        return CountTable(totals, self.order-1, keys=contexts, base=self.base // V,
+                          itos=self.itos, stoi=self.stoi)
+
+
+    def _observed_ids(self):
+        """
+        Returns the sorted ids of the first chars of the observed ngrams
+        """
+
+        if self.first_ids is None:
+            if not self.is_sparse:
+                self.first_ids = np.flatnonzero(self.counts.reshape(self.vocab_size, -1).any(axis=1))
+            else:
+                span = self.vocab_size**(self.order-1)
+                self.first_ids = np.unique((self.sparse_keys - self.base) // span)
+        return self.first_ids
+
+
+    def _get_by_id(self, i):
+        if self.order == 1:
+            # scalar lookup, without the arrays of lookup
+            if not self.is_sparse:
+                return int(self.counts[i])
+            key = self.base + i
+            j = int(np.searchsorted(self.sparse_keys, key))
+            return int(self.counts[j]) if j < len(self.sparse_keys) and self.sparse_keys[j] == key else 0
+
+        view = self.views.get(i)
+        if view is not None:
+            return view
+
+        if not self.is_sparse:
+            view = CountTable(self.counts[i], self.order-1, itos=self.itos, stoi=self.stoi)
+        else:
+            span = self.vocab_size**(self.order-1)
+            low = self.base + i*span
+            lo, hi = np.searchsorted(self.sparse_keys, [low, low+span])
+            view = CountTable(self.counts[lo:hi], self.order-1, keys=self.sparse_keys[lo:hi],
+                              base=low, itos=self.itos, stoi=self.stoi)
+        self.views[i] = view
+        return view
+
+
+    def __getitem__(self, char):
+        i = self.stoi.get(char)
+        if i is not None:
+            # the count of a char in a dense row, the innermost lookup of nested loops
+            if self.order == 1 and self.sparse_keys is None:
+                return int(self.counts[i])
+            return self._get_by_id(i)
+        if self.order == 1:
+            return 0
+        empty = np.zeros(0, dtype=np.int64)
+        return CountTable(empty, self.order-1, keys=empty, itos=self.itos, stoi=self.stoi)
+
+    def get(self, char, default=None):
+        return self[char] if char in self else default
+
+    def keys(self):
+        return [self.itos[i] for i in self._observed_ids()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        ids = self._observed_ids()
+        if self.order == 1:
+            return [(self.itos[i], count) for i, count in zip(ids, self.lookup(ids).tolist())]
+        return [(self.itos[i], self._get_by_id(i)) for i in ids]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self._observed_ids())
+
+    def __contains__(self, char):
+        i = self.stoi.get(char)
+        if i is None:
+            return False
+        if self.order == 1:
+            return self._get_by_id(i) > 0
+        return len(self._get_by_id(i)) > 0
+
+
+class NGramTrie(object):
+    """
+    Counts of the m-grams of every order m = 1..n, stored in a prefix-sharing trie.
+    The node at depth m stands for the m-gram of the chars on its path from the root,
+    so the contexts shared by many ngrams are stored once.
+
+    The trie is stored level by level, in the style of a LOUDS trie: the nodes of a
+    depth are sorted by parent and char, and the children of a node are a contiguous
+    range of the next depth. Every node costs a char id, a count, the total count of
+    its children and the offset of its first child, in the smallest dtypes which fit.
+    """
+
+    def __init__(self, chars, counts, totals, first_child):
+        """
+        Args:
+            chars [list[np.ndarray]]: chars[d-1] holds the vocab ids of the nodes at depth d
+            counts [list[np.ndarray]]: counts[d-1] holds the counts of the d-grams of the nodes at depth d
+            totals [list[np.ndarray]]: totals[d] holds the total count of the children
+                                       of the nodes at depth d (the root is at depth 0)
+            first_child [list[np.ndarray]]: the children of the i-th node at depth d are the nodes
+                                            first_child[d][i] to first_child[d][i+1]-1 at depth d+1
+        """
+
+        self.chars = chars
+        self.counts = counts
+        self.totals = totals
+        self.first_child = first_child
+        self.n = len(chars)
+        self.vocab_size = len(get_vocab())
+
+
+    @classmethod
+    def from_tables(cls, ngram_counts):
+        """
+        Builds the trie from count tables
+
+        Args:
+            ngram_counts [list[CountTable]]: ngram_counts[m-1] holds the counts of m-grams
+
+        Returns:
+            NGramTrie
+        """
+
+        V = len(get_vocab())
+        n = len(ngram_counts)
+
+        # packed keys of the nodes of every depth; the prefixes of the
+        # (m+1)-grams are nodes, even when they were never counted as m-grams
+        nodes = [np.zeros(1, dtype=np.int64)] + [None]*n
+        nodes[n] = ngram_counts[n-1].observed_keys()
+        for m in range(n-1, 0, -1):
+            nodes[m] = np.union1d(ngram_counts[m-1].observed_keys(), nodes[m+1] // V)
+
+        char_dtype = np.min_scalar_type(V-1)
+        chars, counts, totals, first_child = [], [], [], []
+        for m in range(1, n+1):
+            chars.append((nodes[m] % V).astype(char_dtype))
+            level_counts = ngram_counts[m-1].lookup(nodes[m])
+            counts.append(level_counts.astype(np.min_scalar_type(level_counts.max(initial=0))))
+
+            first = np.append(np.searchsorted(nodes[m] // V, nodes[m-1]), len(nodes[m]))
+            cumulative = np.concatenate([[0], np.cumsum(level_counts)])
+            level_totals = cumulative[first[1:]] - cumulative[first[:-1]]
+            first_child.append(first.astype(np.min_scalar_type(len(nodes[m]))))
+            totals.append(level_totals.astype(np.min_scalar_type(level_totals.max(initial=0))))
+
+        return cls(chars, counts, totals, first_child)
+
+
+    def to_tables(self):
+        """
+        Returns the counts as a list of sparse CountTables, ngram_counts[m-1] holding the m-grams
+        """
+
+        V = self.vocab_size
+        tables = []
+        keys = np.zeros(1, dtype=np.int64)
+        for depth in range(1, self.n+1):
+            parents = np.repeat(keys, np.diff(self.first_child[depth-1].astype(np.int64)))
+            keys = parents*V + self.chars[depth-1]
+            counts = self.counts[depth-1].astype(np.int64)
+            observed = counts > 0
+            tables.append(CountTable(counts[observed], depth, keys=keys[observed]))
+        return tables
+
+
+    def add(self, other):
+        """
+        Returns the trie of the counts of both tries
+
+        Args:
+            other [NGramTrie]: trie of the same order
+        """
+
+        return NGramTrie.from_tables(add_counts(self.to_tables(), other.to_tables()))
+
+
+    def find_children(self, nodes, chars, depth):
+        """
+        Vectorized binary search of chars among the children of nodes
+
+        Args:
+            nodes [np.ndarray]: indices of nodes at depth-1
+            chars [np.ndarray]: vocab id of the child to find for every node
+            depth [int]: depth of the children
+
+        Returns:
+            children [np.ndarray]: indices of the children at depth
+            found [np.ndarray]: False where the node has no such child
+        """
+
+        level_chars = self.chars[depth-1]
+        if len(level_chars) == 0:
+            return np.zeros_like(nodes), np.zeros(len(nodes), dtype=bool)
+
+        first = self.first_child[depth-1].astype(np.int64)
+        lo = first[nodes]
+        end = first[nodes+1]
+        hi = end.copy()
+        while True:
+            active = lo < hi
+            if not active.any():
+                break
+            mid = (lo + hi) // 2
+            less = level_chars[np.minimum(mid, len(level_chars)-1)] < chars
+            lo = np.where(active & less, mid+1, lo)
+            hi = np.where(active & ~less, mid, hi)
+
+        children = np.minimum(lo, len(level_chars)-1)
+        found = (lo < end) & (level_chars[children] == chars)
+        return children, found
+
+
+    def lookup(self, keys, order):
+        """
+        Vectorized count lookup
+
+        Args:
+            keys [np.ndarray]: packed keys of m-grams (see get_ngram_keys)
+            order [int]: length m of the m-grams
+
+        Returns:
+            counts [np.ndarray]: counts of the m-grams
+            totals [np.ndarray]: total count of the (m-1)-char contexts of the m-grams
+        """
+
+        V = self.vocab_size
+        keys = np.asarray(keys, dtype=np.int64)
+        nodes = np.zeros(len(keys), dtype=np.int64)
+        found = np.ones(len(keys), dtype=bool)
+        totals = np.full(len(keys), self.totals[0][0], dtype=np.int64)
+        for depth in range(1, order+1):
+            if depth == order:
+                totals = np.where(found, totals, 0)
+            nodes, hit = self.find_children(nodes, (keys // V**(order-depth)) % V, depth)
+            found &= hit
+            if depth < order:
+                totals = self.totals[depth][nodes].astype(np.int64)
+
+        counts = np.where(found, self.counts[order-1][nodes], 0).astype(np.int64)
+        return counts, totals
+
+
+    def get_children(self, context_key, order):
+        """
+        Walks the children of a context
+
+        Args:
+            context_key [int]: packed key of the context
+            order [int]: number of chars in the context
+
+        Returns:
+            chars [np.ndarray]: vocab ids of the chars observed after the context
+            counts [np.ndarray]: counts of these chars after the context
+        """
+
+        V = self.vocab_size
+        empty = np.zeros(0, dtype=np.int64)
+        if order >= self.n:
+            return empty, empty
+
+        node = np.zeros(1, dtype=np.int64)
+        for depth in range(1, order+1):
+            node, found = self.find_children(node, np.array([(context_key // V**(order-depth)) % V]), depth)
+            if not found[0]:
+                return empty, empty
+
+        first = self.first_child[order]
+        lo, hi = int(first[node[0]]), int(first[node[0]+1])
+        return self.chars[order][lo:hi].astype(np.int64), self.counts[order][lo:hi].astype(np.int64)
+
+
+    def get_arrays(self):
+        """
+        Returns the arrays of the trie by name (see from_arrays)
+        """
+
+        arrays = dict()
+        for name in ("chars", "counts", "totals", "first_child"):
+            for depth, array in enumerate(getattr(self, name)):
+                arrays[f"{name}.{depth}"] = array
+        return arrays
+
+
+    @classmethod
+    def from_arrays(cls, arrays, n):
+        """
+        Builds a trie of order n from the arrays of get_arrays
+        """
+
+        return cls(*[[arrays[f"{name}.{depth}"] for depth in range(n)]
+                     for name in ("chars", "counts", "totals", "first_child")])
+
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.get_arrays().values())
+
+
+class LRUCache(object):
+    """
+    Bounded dictionary which evicts the least recently used entry when it is full.
+    Keeps count of the lookups which hit or missed the cache.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Args:
+            maxsize [int]: maximum number of entries; None for an unbounded cache
+        """
+
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key in self.data:
+            self.data.move_to_end(key)
+            self.hits += 1
+            return self.data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.data.pop(key, default)
+
+    def clear(self):
+        self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+
+class ContextRows(object):
+    """
+    Tables with one row per context, e.g. the cumulative distributions or the
+    alias tables used to sample the next char. The row of a context is only
+    built the first time the context is asked for.
+    """
+
+    def __init__(self, build_rows):
+        """
+        Args:
+            build_rows [function]: build_rows(context_keys, slots) returns a tuple of
+                                   arrays holding one row for each of the contexts,
+                                   which are stored at the given slots
+        """
+
+        self.build_rows = build_rows
+        self.slots = {}
+        self.tables = None
+
+    def get_slots(self, context_keys):
+        """
+        Returns the rows of some contexts in the tables, building the missing ones
+
+        Args:
+            context_keys [np.ndarray]: packed context keys
+
+        Returns:
+            slots [np.ndarray]: row of every context
+        """
+
+        contexts, inverse = np.unique(context_keys, return_inverse=True)
+        missing = [context for context in contexts.tolist() if context not in self.slots]
+        if missing:
+            slots = np.arange(len(self.slots), len(self.slots)+len(missing))
+            rows = self.build_rows(np.array(missing, dtype=np.int64), slots)
+            if self.tables is None:
+                self.tables = [np.zeros((max(64, 2*len(slots)),)+row.shape[1:], dtype=row.dtype) for row in rows]
+            elif slots[-1] >= len(self.tables[0]):
+                tables = []
+                for table in self.tables:
+                    grown = np.zeros((2*(slots[-1]+1),)+table.shape[1:], dtype=table.dtype)
+                    grown[:len(table)] = table
+                    tables.append(grown)
+                self.tables = tables
+            for table, row in zip(self.tables, rows):
+                table[slots] = row
+            self.slots.update(zip(missing, slots.tolist()))
+
+        slots = np.array([self.slots[context] for context in contexts.tolist()], dtype=np.int64)
+        return slots[inverse]
+
+    def refresh(self, context_keys):
+        """
+        Rebuilds the rows of some contexts, if they have been built before
+
+        Args:
+            context_keys [np.ndarray]: packed context keys
+        """
+
+        contexts = [context for context in np.unique(context_keys).tolist() if context in self.slots]
+        if contexts:
+            slots = np.array([self.slots[context] for context in contexts], dtype=np.int64)
+            rows = self.build_rows(np.array(contexts, dtype=np.int64), slots)
+            for table, row in zip(self.tables, rows):
+                table[slots] = row
+
+    def get_tables(self):
+        """
+        Returns the tables, trimmed to the rows which have been built
+        """
+
+        return [table[:len(self.slots)] for table in self.tables]
+
+    def __len__(self):
+        return len(self.slots)
+
+
+def build_alias_table(probs):
+    """
+    Builds the alias table of a probability distribution (Walker's method, as
+    described by Vose), to sample from it in constant time:
+    draw a char i uniformly, keep it with probability accept[i], otherwise take alias[i]
+
+    Args:
+        probs [np.ndarray]: probability of every char
+
+    Returns:
+        accept [np.ndarray]: probability of keeping each char
+        alias [np.ndarray]: char taken instead of each char
+    """
+
+    V = len(probs)
+    scaled = (probs*V/probs.sum()).tolist()
+    accept = np.ones(V)
+    alias = np.arange(V)
+
+    small = [i for i in range(V) if scaled[i] < 1]
+    large = [i for i in range(V) if scaled[i] >= 1]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        accept[s] = scaled[s]
+        alias[s] = l
+        scaled[l] = scaled[l] + scaled[s] - 1
+        if scaled[l] < 1:
+            small.append(l)
+        else:
+            large.append(l)
+
+    return accept, alias
+
+
+worker_corpus = None # corpus counted by the worker processes of count_ngram_table
+
+def set_worker_corpus(corpus, vocab):
+    """
+    Initializer of the worker processes of count_ngram_table
+    """
+
+    global worker_corpus
+    worker_corpus = corpus
+    set_vocab(vocab)
+
+
+def count_shard(shard):
+    """
+    Counts the ngrams of a shard of the corpus, in a worker process
+
+    Args:
+        shard [tuple]: (start, stop, ngram, sparse); the shard holds the names
+                       worker_corpus[start:stop], see count_ngram_table
+
+    Returns:
+        counts [tuple]: (keys, counts) of the observed ngrams for a sparse count,
+                        (None, counts) with the dense array of counts otherwise
+    """
+
+    start, stop, ngram, sparse = shard
+    ids, offsets = get_corpus_ids(worker_corpus[start:stop])
+    table = CountTable.from_keys(get_ngram_keys(ids, offsets, ngram), order=ngram, sparse=sparse)
+    return table.sparse_keys, table.counts.reshape(-1)
+
+
+def merge_shard_counts(pair):
+    """
+    Adds the counts of two shards (see count_shard)
+
+    Args:
+        pair [tuple]: the two (keys, counts) tuples to add
+
+    Returns:
+        counts [tuple]: (keys, counts) of the sum
+    """
+
+    (keys1, counts1), (keys2, counts2) = pair
+    if keys1 is None:
+        return None, counts1 + counts2
+
+    keys, inverse = np.unique(np.concatenate([keys1, keys2]), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate([counts1, counts2]), minlength=len(keys))
+    return keys, counts.astype(np.int64)
+
+
+def count_ngram_table(corpus, ngram, sparse=None, workers=None):
+    """
+    Counts the ngrams of a corpus into a CountTable.
+    Large corpora are split into shards which are counted by a pool of forked processes;
+    the counts of the shards are then added pairwise, in a tree, by the same pool.
+    Where processes cannot be forked (windows), the corpus is counted in this process.
+
+    Args:
+        corpus [list[list[str]]]: list of tokenized names
+        ngram [int]: length of the ngrams
+        sparse [bool]: store the counts sparsely (see CountTable.from_keys)
+        workers [int]: number of processes; defaults to COUNT_WORKERS
+
+    Returns:
+        CountTable
+    """
+
+    if sparse is None:
+        sparse = len(get_vocab())**ngram > MAX_DENSE_COUNTS
+    if workers is None:
+        workers = COUNT_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(corpus) // MIN_NAMES_PER_WORKER))
+
+    # the workers must be forked, so that they share the vocab and the corpus of this
+    # process; other start methods would pickle the whole corpus into every worker
+    if "fork" not in multiprocessing.get_all_start_methods():
+        workers = 1
+
+    if workers == 1:
+        ids, offsets = get_corpus_ids(corpus)
+        return CountTable.from_keys(get_ngram_keys(ids, offsets, ngram), order=ngram, sparse=sparse)
+
+    # only the bounds of the shards and the counts are sent between the processes
+    context = multiprocessing.get_context("fork")
+    bounds = np.linspace(0, len(corpus), workers+1).astype(int).tolist()
+    shards = [(lo, hi, ngram, sparse) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+    with context.Pool(workers, initializer=set_worker_corpus, initargs=(corpus, get_vocab())) as pool:
+        parts = pool.map(count_shard, shards)
+        while len(parts) > 1:
+            pairs = list(zip(parts[0::2], parts[1::2]))
+            parts = pool.map(merge_shard_counts, pairs) + parts[2*len(pairs):]
+
+    keys, counts = parts[0]
+    if keys is None:
+        V = len(get_vocab())
+        return CountTable(counts.reshape((V,)*ngram), ngram)
+    return CountTable(counts, ngram, keys=keys)
+
+
+def get_unigram_counts(corpus):
+    """
+    Given a corpus, calculates the unigram counts for each character in the corpus
+
+    Args:
+        corpus [list[list[str]]]: list of tokenized characters. Text is appended with END token.
+
+    Returns:
+        unigram_counts [dict [key: char, value: count]]:
+            dictionary of unigram counts for each character in the corpus
+            (a CountTable which reads the same way, if COUNT_WITH_ARRAYS is set)
+        Example:
+        > unigram_counts["c1"] = 5
+    """
+
+    # ADD YOUR CODE HERE
+
+    # BEGIN CODE
+    if COUNT_WITH_ARRAYS:
+        return count_ngram_table(corpus, 1)
+
+    unigram_counts = defaultdict(int)
+
+    for name in corpus:
+      if name[0]==START:name = name[1:]
+      for i in range(len(name)):unigram_counts[name[i]]+=1
+    # END CODE
+
+    return unigram_counts
+
+def get_bigram_counts(corpus):
+    """
+    Given a corpus, calculates the bigram counts for each bigram in the corpus.
+    The corpus *only* contains END tokens at the end of names.
+    You may want to handle the case whhere beginning of the name
+    does not have n-1 prior chars.
+
+    Args:
+        corpus [list[list[str]]]: list of tokenized text. Text is appended with END token.
+
+    Returns:
+        bigram_counts [dict[dict]]:
+            nested dictionary of bigram counts for each bigram in the corpus
+            (a CountTable which reads the same way, if COUNT_WITH_ARRAYS is set)
+        Example:
+        > bigram_counts["c1"]["c2"] = 5
+        here bigram_counts["c1"]["c2"] represents P("c2"|"c1")
+        P["c1"]["c2"] means P[char_i = "c2"|char_{i-1} = "c1"]
+    """
+
+    # ADD YOUR CODE HERE
+
+    # BEGIN CODE
+    if COUNT_WITH_ARRAYS:
+        return count_ngram_table(corpus, 2)
+
+    bigram_counts = defaultdict(lambda :defaultdict(int))
+
+    for name in corpus:
+      for i in range(len(name)-1):bigram_counts[name[i]][name[i+1]]+=1
+    # END CODE
+
+
+    return bigram_counts
+
+def get_trigram_counts(corpus):
+    """
+    Given a corpus, calculates the trigram counts for each trigram in the corpus.
+    The corpus *only* contains END tokens at the end of names.
+    You may want to handle the case where beginning of the text
+    does not have n-1 prior chars.
+
+    Args:
+        corpus [list[list[str]]]: list of tokenized text. Text is appended with END token.
+
+    Returns:
+        trigram_counts [dict[dict[dict]]]:
+            nested dictionary for each trigram in the corpus
+            (a CountTable which reads the same way, if COUNT_WITH_ARRAYS is set)
+        Example:
+        > trigram_counts["c1"]["c2"]["c3"] = 5
+        P["c1"]["c2"]["c3] means P[char_i = "c3"|char_{i-2} = "c1", char_{i-1} = "c2"]
+
+    """
+
+    # ADD YOUR CODE HERE
+
+    # BEGIN CODE
+    if COUNT_WITH_ARRAYS:
+        return count_ngram_table(corpus, 3)
+
+    trigram_counts = defaultdict(lambda:defaultdict(lambda:defaultdict(int)))
+
+    for name in corpus:
+      name = [START]+name
+      for i in range(len(name)-2):trigram_counts[name[i]][name[i+1]][name[i+2]]+=1
+    # END CODE
+
+
+    return trigram_counts
+
+def add_counts(counts, new_counts):
+    """
+    Adds ngram counts, in place
+
+    Args:
+        counts [dict, CountTable, NGramTrie or list]: counts returned by get_*_counts, or a list of them
+        new_counts: counts of the same structure
+
+    Returns:
+        counts: the updated counts
+    """
+
+    if isinstance(counts, list):
+        return [add_counts(old, new) for old, new in zip(counts, new_counts)]
+
+    if isinstance(counts, (CountTable, NGramTrie)):
+        return counts.add(new_counts)
+
+    for char, value in new_counts.items():
+        if isinstance(value, (dict, CountTable)):
+            add_counts(counts[char], value)
+        else:
+            counts[char] += value
+    return counts
+
+def get_count_order(counts):
+    """
+    Returns the number of chars indexing nested dictionaries of counts
+    """
+
+    order = 0
+    while isinstance(counts, dict):
+        order += 1
+        counts = next(iter(counts.values()), 0)
+    return order
+
+
+LAMBDA_EM_ITERATIONS = 500 # maximum number of EM iterations when tuning interpolation weights
+LAMBDA_GRID_STEP = 0.05 # spacing of the grid of interpolation weights searched by fit_lambdas_grid
+
+
+def fit_lambdas_em(components, iterations=LAMBDA_EM_ITERATIONS, tolerance=1e-9):
+    """
+    Fits mixture weights which maximise the likelihood of held-out tokens with
+    expectation maximisation. Every iteration costs two matrix-vector products.
+
+    Args:
+        components [np.ndarray]: matrix of shape (tokens, components) of the probability
+                                 of every held-out token under every component
+        iterations [int]: maximum number of iterations
+        tolerance [float]: stop when the mean log likelihood improves by less than this
+
+    Returns:
+        lambdas [np.ndarray]: weights of the components, summing to one
+    """
+
+    components = components[components.any(axis=1)]
+    lambdas = np.full(components.shape[1], 1/components.shape[1])
+    log_likelihood = -np.inf
+    for _ in range(iterations):
+        probs = components @ lambdas
+        new_log_likelihood = np.mean(np.log(probs))
+        if new_log_likelihood - log_likelihood < tolerance:
+            break
+        log_likelihood = new_log_likelihood
+        # posterior weight of every component, averaged over the tokens
+        lambdas = lambdas * (components.T @ (1/probs)) / len(probs)
+    return lambdas
+
+
+def fit_lambdas_grid(components, step=LAMBDA_GRID_STEP, batch_size=256):
+    """
+    Finds the mixture weights on a grid over the simplex which maximise the
+    likelihood of held-out tokens. Candidates are scored in batches, with one
+    matrix product per batch.
+
+    Args:
+        components [np.ndarray]: matrix of shape (tokens, components) of the probability
+                                 of every held-out token under every component
+        step [float]: spacing of the grid
+        batch_size [int]: number of candidates scored at once
+
+    Returns:
+        lambdas [np.ndarray]: weights of the components, summing to one
+    """
+
+    k = components.shape[1]
+    m = int(round(1/step))
+
+    # every way to split m steps among k components
+    bars = np.array(list(combinations(range(m+k-1), k-1)), dtype=np.int64).reshape(-1, k-1)
+    bounds = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), m+k-1)])
+    candidates = (np.diff(bounds, axis=1) - 1) / m
+
+    components = components[components.any(axis=1)]
+    best, best_score = None, -np.inf
+    for i in range(0, len(candidates), batch_size):
+        batch = candidates[i:i+batch_size]
+        with np.errstate(divide='ignore'):
+            scores = np.log(components @ batch.T).sum(axis=0)
+        j = np.argmax(scores)
+        if scores[j] > best_score:
+            best, best_score = batch[j], scores[j]
+    return best
+
+
+"""
+Implementation of the n-gram language models.
+All other n-gram models (unigram, bigram, etc.) would follow the same skeleton.
+"""
+
+class NGramLanguageModel(object):
+    """
+    Character n-gram model of any order n with interpolation smoothing.
+
+    The counts of every order m = 1..n are stored as sorted arrays of packed
+    integer keys (see get_ngram_keys), so memory and lookup cost grow with the
+    number of ngrams observed in the train text and not with |V|^n.
+    With context_store="trie", they are stored in an NGramTrie instead, which shares
+    the contexts of the ngrams and takes less memory for high orders.
+    """
+
+    use_alias_tables = False # sample names from alias tables instead of cumulative distributions
+    interpolated = True # probabilities are a mixture of components weighted by lambdas (see tune_lambdas)
+    count_names = ("ngram_counts", "context_counts") # attributes holding the counts of the model
+    param_names = ("n", "lambdas", "context_store", "use_alias_tables") # attributes holding the parameters of the model
+
+    def __init__(self, train_text, n=3, lambdas=None, context_store="arrays"):
+        """
+        Initialise and train the model with train_text.
+
+        Args:
+            train_text [list of list]: list of tokenised names
+            n [int]: length of the ngrams
+            lambdas [tuple[float]]: interpolation weights of the n-gram, (n-1)-gram, ..., unigram
+                                    probabilities; equal weights if unspecified
+            context_store [str]: "arrays" to store the counts of every order in a CountTable,
+                                 "trie" to store them in an NGramTrie
+
+        Returns:
+            -
+        """
+
+        self.n = n
+        self.lambdas = tuple(lambdas) if lambdas is not None else (1/n,)*n
+        if len(self.lambdas) != n:
+            raise ValueError(f"expected {n} lambdas, got {len(self.lambdas)}")
+        if context_store not in ("arrays", "trie"):
+            raise ValueError(f"unknown context store {context_store}")
+        self.context_store = context_store
+        if context_store == "trie":
+            self.count_names = ("trie",)
+
+        for name, counts in self.count_ngrams(train_text).items():
+            setattr(self, name, counts)
+
+
+    def count_ngrams(self, text):
+        """
+        Counts the ngrams of a text, in the structures used by the model
+
+        Args:
+            text [list of list]: list of tokenised names
+
+        Returns:
+            counts [dict]: counts for each of the attributes in count_names
+        """
+
+        V = len(get_vocab())
+        top_counts = count_ngram_table(text, self.n, sparse=True)
+
+        # ngram_counts[m-1] holds the counts of m-grams,
+        # context_counts[m-1] the total count of their (m-1)-char contexts;
+        # the last m chars of an n-gram are the m-gram predicting the same token
+        ngram_counts = []
+        context_counts = []
+        for m in range(1, self.n+1):
+            counts = CountTable.from_keys(top_counts.sparse_keys % V**m, order=m, sparse=True,
+                                          weights=top_counts.counts)
+            ngram_counts.append(counts)
+            context_counts.append(counts.get_context_totals())
+
+        if self.context_store == "trie":
+            return {"trie": NGramTrie.from_tables(ngram_counts)}
+        return {"ngram_counts": ngram_counts, "context_counts": context_counts}
+
+
+    def update(self, new_names):
+        """
+        Adds the counts of new names to the model, without recounting the train text
+
+        Args:
+            new_names [list of list]: list of tokenised names
+        """
+
+        self.add_counts(self.count_ngrams(new_names))
+
+
+    def merge(self, other):
+        """
+        Adds the counts of another model of the same kind to the model
+
+        Args:
+            other [NGramLanguageModel]: model of the same class and order
+        """
+
+        if type(other) is not type(self) or other.n != self.n or other.count_names != self.count_names:
+            raise ValueError(f"cannot merge a {type(other).__name__} into a {type(self).__name__}")
+        self.add_counts({name: getattr(other, name) for name in self.count_names})
+
+
+    def add_counts(self, new_counts):
+        """
+        Adds counts to the model, and rebuilds the cached probabilities
+        of the contexts whose distribution changed
+
+        Args:
+            new_counts [dict]: counts for each of the attributes in count_names
+        """
+
+        changed_contexts = self.get_changed_contexts(new_counts)
+        for name in self.count_names:
+            setattr(self, name, add_counts(getattr(self, name), new_counts[name]))
+        self.invalidate_contexts(changed_contexts)
+
+
+    def get_changed_contexts(self, new_counts):
+        """
+        Returns the packed keys of the contexts whose distribution changes
+        when new_counts are added, or None if all of them change.
+        The lower order probabilities are interpolated in every context,
+        so any new count changes every distribution.
+        """
+
+        return None
+
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized probability lookup
+
+        Args:
+            keys [np.ndarray]: packed ngram keys (see get_ngram_keys)
+
+        Returns:
+            probs [np.ndarray]: probability of the last char of every ngram given its n-1 prior chars
+        """
+
+        return self.get_component_probabilities(keys) @ np.array(self.get_lambdas())
+
+
+    def get_component_probabilities(self, keys):
+        """
+        Probabilities of the components of the interpolation, so that
+        get_token_probabilities(keys) = get_component_probabilities(keys) @ lambdas
+
+        Args:
+            keys [np.ndarray]: packed ngram keys (see get_ngram_keys)
+
+        Returns:
+            components [np.ndarray]: array of shape (len(keys), n); column i holds the
+                                     smoothed probability of the (n-i)-gram model
+        """
+
+        V = len(get_vocab())
+        V_out = V-1 # START is never predicted
+        keys = np.asarray(keys, dtype=np.int64)
+
+        components = np.zeros((len(keys), self.n))
+        for i, m in enumerate(range(self.n, 0, -1)):
+            keys_m = keys % V**m
+            if self.context_store == "trie":
+                counts, totals = self.trie.lookup(keys_m, m)
+            else:
+                totals = self.context_counts[m-1].lookup(keys_m // V)
+                counts = self.ngram_counts[m-1].lookup(keys_m)
+            components[:, i] = 0.95*np.where(totals > 0, counts/np.maximum(totals, 1), 1/V_out) + 0.05/V_out
+
+        components[keys % V == get_vocab()[START]] = 0
+        return components
+
+
+    def get_lambdas(self):
+        """
+        Returns the interpolation weights, in the order of the components
+        """
+
+        return self.lambdas
+
+
+    def set_lambdas(self, lambdas):
+        """
+        Sets the interpolation weights and drops the probabilities computed with the old ones
+        """
+
+        self.lambdas = tuple(float(l) for l in lambdas)
+        self.clear_caches()
+
+
+    def tune_lambdas(self, text, method="em"):
+        """
+        Fits the interpolation weights on held-out text and sets them in the model.
+        The probability of every held-out token under every component is computed once
+        (see get_component_probabilities); each candidate weighting then only costs
+        a matrix-vector product.
+
+        Args:
+            text [list of list]: held-out tokenised names
+            method [str]: "em" for expectation maximisation (see fit_lambdas_em),
+                          "grid" for a grid search (see fit_lambdas_grid)
+
+        Returns:
+            lambdas [tuple[float]]: the fitted weights
+        """
+
+        if not self.interpolated:
+            raise ValueError(f"{type(self).__name__} does not interpolate its probabilities")
+
+        ids, offsets = get_corpus_ids(text)
+        components = self.get_component_probabilities(get_ngram_keys(ids, offsets, self.n))
+        if method == "em":
+            lambdas = fit_lambdas_em(components)
+        elif method == "grid":
+            lambdas = fit_lambdas_grid(components)
+        else:
+            raise ValueError(f"unknown tuning method {method}")
+
+        self.set_lambdas(lambdas)
+        return self.get_lambdas()
+
+
+    def get_context_key(self, sequence):
+        """
+        Packs the last n-1 chars of a sequence into a context key,
+        padding the sequence with START tokens if it is too short
+
+        Args:
+            sequence [list[str]]: list of characters
+
+        Returns:
+            context key [int]
+        """
+
+        V = len(get_vocab())
+        context = [START]*(self.n-1) + [char for char in sequence if char != START]
+        key = 0
+        for char in context[len(context)-(self.n-1):]:
+            key = key*V + get_vocab()[char]
+        return key
+
+
+    def get_next_char_distribution(self, context_keys):
+        """
+        Returns the probability distributions over the vocab ids following some contexts
+
+        Args:
+            context_keys [np.ndarray]: packed keys of n-1 chars (see get_context_key)
+
+        Returns:
+            probs [np.ndarray]: array of shape len(context_keys) x |V|
+        """
+
+        V = len(get_vocab())
+        context_keys = np.asarray(context_keys, dtype=np.int64)
+        if self.has_probability_table():
+            return np.exp(self.get_log_probability_table().reshape(-1, V)[context_keys])
+
+        keys = context_keys.reshape(-1, 1)*V + np.arange(V)
+        return self.get_token_probabilities(keys.ravel()).reshape(-1, V)
+
+
+    def get_next_char_probabilities(self, context=None):
+        """
+        Returns a probability distribution over all chars in the vocabulary.
+        Probability distribution should sum to one.
+
+        Args:
+            context [list[str]]: chars preceding the next char;
+                                 [START]*(n-1) if unspecified
+
+        Returns:
+            P: dictionary or nested dictionary; Output format depends on n-gram
+            Examples:
+                for N=1 (unigram); dict[key:unigram,value:probability of unigram]
+                    > P["c1"] = 0.0001
+                for N=2 (bigram); dict[key:bigram_char1, value:dict[key:bigram_char2,value:probability of bigram]]
+                    > P["c1"]["c2"] = 0.0001
+                    P["c1"]["c2"] means P["c2"|"c1"]
+                for N=3 (trigram); dict[dict[dict]]
+                    > P["c1"]["c2"]["c3"] = 0.0001
+                    P["c1"]["c2"]["c3] means P[char_i = "c3"|char_{i-2} = "c1", char_{i-1} = "c2"]
+            This generic model returns the distribution for a single context,
+            dict[key:char, value:probability of char after context]
+        """
+
+        if context is None:
+            context = [START]*(self.n-1)
+
+        probs = self.get_next_char_distribution([self.get_context_key(context)])[0]
+        itos = get_vocab().get_itos()
+        return {itos[i]: probs[i] for i in range(len(itos)) if itos[i] != START}
+
+
+    def get_distribution_contexts(self):
+        """
+        Returns the packed keys of the contexts whose distributions are returned by
+        get_next_char_probabilities, so that they can be checked as the rows of
+        get_next_char_distribution (see check_validity_of_table)
+
+        Returns:
+            context_keys [np.ndarray]
+        """
+
+        return np.array([self.get_context_key([])], dtype=np.int64)
+
+
+    def get_contexts_without_end(self):
+        """
+        Returns the packed keys of all the contexts of n-1 chars which do not contain END,
+        i.e. the contexts of the nested dictionaries of the smoothed models
+        """
+
+        V = len(get_vocab())
+        keys = np.arange(V**(self.n-1), dtype=np.int64)
+        has_end = np.zeros(len(keys), dtype=bool)
+        for i in range(self.n-1):
+            has_end |= (keys // V**i) % V == get_vocab()[END]
+        return keys[~has_end]
+
+
+    def get_name_log_probability(self, name):
+        """
+        Calculates the log probability of name according to the language model
+
+        Args:
+            name [list]: list of tokens
+
+        Returns:
+            log_prob [float]: Log probability of the given name
+        """
+
+        ids, offsets = get_corpus_ids([name])
+        return np.sum(self.get_token_log_probabilities(get_ngram_keys(ids, offsets, self.n)))
+
+
+    def has_probability_table(self):
+        """
+        Returns True if probabilities are read from the dense table of get_log_probability_table,
+        i.e. when the table is small enough and the model does not compute its probabilities lazily
+        """
+
+        return len(get_vocab())**self.n <= MAX_DENSE_COUNTS and not getattr(self, "lazy", False)
+
+
+    def get_log_probability_table(self):
+        """
+        Returns the log probabilities of all ngrams as a dense |V|x...x|V| array,
+        i.e. table[c1][c2][c3] = log P(c3|c1 c2) for a trigram model.
+        The table is built from get_token_probabilities once and then cached.
+        """
+
+        if getattr(self, "log_probability_table", None) is None:
+            V = len(get_vocab())
+            with np.errstate(divide='ignore'):
+                table = np.log(self.get_token_probabilities(np.arange(V**self.n, dtype=np.int64)))
+            self.log_probability_table = table.reshape((V,)*self.n)
+        return self.log_probability_table
+
+
+    def get_token_log_probabilities(self, keys):
+        """
+        Vectorized log probability lookup
+
+        Args:
+            keys [np.ndarray]: packed ngram keys (see get_ngram_keys)
+
+        Returns:
+            log_probs [np.ndarray]: log probability of the last char of every ngram given its n-1 prior chars
+        """
+
+        if self.has_probability_table():
+            return self.get_log_probability_table().reshape(-1)[keys]
+
+        with np.errstate(divide='ignore'):
+            return np.log(self.get_token_probabilities(keys))
+
+
+    def get_perplexity(self, text):
+        """
+        Returns the perplexity of the model on a text as a float.
+        The text is scored as one flat array of ngram keys.
+
+        Args:
+            text [list]: a list of string tokens
+
+        Returns:
+            perplexity [float]: perplexity of the given text
+        """
+
+        ids, offsets = get_corpus_ids(text)
+        keys = get_ngram_keys(ids, offsets, self.n)
+        entropy = -np.sum(self.get_token_log_probabilities(keys))/len(keys)
+        return np.exp(entropy)
+
+
+    def get_sampling_distribution(self, context_keys):
+        """
+        Returns the distributions to sample the next char from after some contexts;
+        contexts without any continuation can only end the name
+        """
+
+        probs = self.get_next_char_distribution(context_keys)
+        probs[probs.sum(axis=1) == 0, get_vocab()[END]] = 1
+        return probs
+
+
+    def build_cdf_rows(self, context_keys, slots):
+        """
+        Builds the cumulative distributions of the next char after some contexts.
+        Each row is shifted by its slot, so that the whole table is one sorted
+        array (row s holds values in [s, s+1]).
+        """
+
+        cdf = np.cumsum(self.get_sampling_distribution(context_keys), axis=1)
+        cdf /= cdf[:, -1:]
+        return (cdf + slots[:, None],)
+
+
+    def build_alias_rows(self, context_keys, slots):
+        """
+        Builds the alias tables of the next char after some contexts (see build_alias_table)
+        """
+
+        tables = [build_alias_table(probs) for probs in self.get_sampling_distribution(context_keys)]
+        return np.array([accept for accept, _ in tables]), np.array([alias for _, alias in tables])
+
+
+    def sample_next_chars(self, context_keys):
+        """
+        Samples the next char after every context.
+        By default, this is inverse CDF sampling with a single np.searchsorted
+        over the cumulative distribution table. If use_alias_tables is set,
+        every char is drawn in constant time from the alias table of its context.
+
+        Args:
+            context_keys [np.ndarray]: packed keys of n-1 chars (see get_context_key)
+
+        Returns:
+            chars [np.ndarray]: vocab ids of the sampled chars
+        """
+
+        V = len(get_vocab())
+        if self.use_alias_tables:
+            if getattr(self, "alias_rows", None) is None:
+                self.alias_rows = ContextRows(self.build_alias_rows)
+            slots = self.alias_rows.get_slots(context_keys)
+            accept, alias = self.alias_rows.get_tables()
+            chars = np.random.randint(V, size=len(slots))
+            keep = np.random.random(len(slots)) < accept[slots, chars]
+            return np.where(keep, chars, alias[slots, chars])
+
+        if getattr(self, "cdf_rows", None) is None:
+            self.cdf_rows = ContextRows(self.build_cdf_rows)
+        slots = self.cdf_rows.get_slots(context_keys)
+        cdf, = self.cdf_rows.get_tables()
+        idx = np.searchsorted(cdf.ravel(), slots + np.random.random(len(slots)), side='right')
+        return np.clip(idx - slots*V, 0, V-1)
+
+
+    def generate_names(self, k, n=MAX_NAME_LENGTH, prefix=None):
+        """
+        Given a prefix, generate k names according to the model.
+        The default prefix is None.
+        You may stop the generation when n tokens have been generated,
+        or when you encounter the END token.
+
+        All k names are generated together, one char of every unfinished name per step.
+
+        Args:
+            k [int]: Number of names to generate
+            n [int]: Maximum length (number of tokens) in the generated name
+            prefix [list of tokens]: Prefix after which the names have to be generated
+
+        Returns:
+            names [list[str]]: list of generated names
+        """
+
+        V = len(get_vocab())
+        prefix = [char for char in (prefix or []) if char != START]
+        context_keys = np.full(k, self.get_context_key(prefix), dtype=np.int64)
+        generated = np.full((k, n), -1, dtype=np.int64)
+        active = np.arange(k)
+
+        for step in range(n):
+            if len(active) == 0:
+                break
+            chars = self.sample_next_chars(context_keys[active])
+            is_end = chars == get_vocab()[END]
+            active, chars = active[~is_end], chars[~is_end]
+            generated[active, step] = chars
+            context_keys[active] = (context_keys[active]*V + chars) % V**(self.n-1)
+
+        itos = get_vocab().get_itos()
+        prefix = "".join(prefix)
+        return [prefix + "".join(itos[i] for i in name if i >= 0) for name in generated.tolist()]
+
+
+    def build_top_chars_rows(self, context_keys, slots):
+        """
+        Builds the index of most likely chars after some contexts: the vocab ids
+        sorted by decreasing probability, and the number of chars with a
+        non-zero probability
+        """
+
+        probs = self.get_next_char_distribution(context_keys)
+        order = np.argsort(-probs, axis=1, kind='stable').astype(np.min_scalar_type(len(get_vocab())))
+        return order, np.count_nonzero(probs, axis=1)
+
+
+    def get_most_likely_chars_batch(self, sequences, k):
+        """
+        Given many sequences of characters, outputs the k most likely characters after each of them.
+        The ranking of the chars after a context is computed once and then reused.
+
+        Args:
+            sequences [list[list[str]]]: list of sequences of characters
+            k [int]: number of most likely characters to return
+
+        Returns:
+            chars [list[list[str]]]: *Ordered* list of most likely characters for every sequence
+        """
+
+        if getattr(self, "top_chars_rows", None) is None:
+            self.top_chars_rows = ContextRows(self.build_top_chars_rows)
+
+        context_keys = np.array([self.get_context_key(sequence) for sequence in sequences], dtype=np.int64)
+        slots = self.top_chars_rows.get_slots(context_keys)
+        order, num_nonzero = self.top_chars_rows.get_tables()
+
+        itos = get_vocab().get_itos()
+        return [[itos[i] for i in top[:size]]
+                for top, size in zip(order[slots, :k].tolist(), num_nonzero[slots].tolist())]
+
+
+    def get_most_likely_chars(self, sequence, k):
+        """
+        Given a sequence of characters, outputs k most likely characters after the sequence.
+
+        Args:
+            sequence [list[str]]: list of characters
+            k [int]: number of most likely characters to return
+
+        Returns:
+            chars [list[str]]: *Ordered* list of most likely characters
+                        (with charcater at index 0 being the most likely and
+                        character at index k-1 being the least likely)
+
+        """
+
+        return self.get_most_likely_chars_batch([sequence], k)[0]
+
+
+    def get_count_table(self, name, order):
+        """
+        Returns the counts held by an attribute (e.g. "bigram_counts") as a CountTable.
+        Counts held in dictionaries are converted once; the tables are kept until
+        clear_caches or invalidate_contexts, or until the attribute is replaced.
+
+        Args:
+            name [str]: name of the attribute holding the counts
+            order [int]: length of the ngrams counted
+
+        Returns:
+            CountTable
+        """
+
+        return self.get_cached_table(name, name, lambda counts: CountTable.from_counts(counts, order))
+
+
+    def get_context_totals(self, name, order):
+        """
+        Returns the total counts of the contexts of the ngrams counted by an attribute
+        (see CountTable.get_context_totals), cached like get_count_table
+        """
+
+        return self.get_cached_table(name + ".totals", name,
+                                     lambda counts: self.get_count_table(name, order).get_context_totals())
+
+
+    def get_cached_table(self, key, name, build):
+        """
+        Returns build(counts) for the counts held by an attribute, computed once;
+        the table is rebuilt if the attribute no longer holds the same object
+
+        Args:
+            key [str]: key of the table in the cache
+            name [str]: name of the attribute holding the counts
+            build [function]: builds the table from the counts
+        """
+
+        counts = getattr(self, name)
+        tables = getattr(self, "count_tables", None)
+        if tables is None:
+            self.count_tables = tables = dict()
+        entry = tables.get(key)
+        if entry is None or entry[0] is not counts:
+            entry = tables[key] = (counts, build(counts))
+        return entry[1]
+
+
+    def clear_caches(self):
+        """
+        Drops the probability and sampling tables derived from the counts,
+        so that they are rebuilt the next time they are used
+        """
+
+        self.count_tables = None
+        self.log_probability_table = None
+        self.cdf_rows = None
+        self.alias_rows = None
+        self.top_chars_rows = None
+        self.__dict__.pop("next_char_probabilities", None)
+        self.__dict__.pop("uni_char_probabilities", None)
+
+
+    def invalidate_contexts(self, context_keys=None):
+        """
+        Rebuilds the cached probabilities of some contexts after the counts changed.
+        Only the rows of these contexts are recomputed in the probability,
+        sampling and top-k tables; the nested dictionary of
+        get_next_char_probabilities is rebuilt the next time it is used.
+
+        Args:
+            context_keys [np.ndarray]: packed context keys; None to drop every cached probability
+        """
+
+        if context_keys is None:
+            self.clear_caches()
+            return
+
+        V = len(get_vocab())
+        context_keys = np.asarray(context_keys, dtype=np.int64)
+        self.count_tables = None
+        self.__dict__.pop("next_char_probabilities", None)
+        if getattr(self, "log_probability_table", None) is not None:
+            keys = (context_keys.reshape(-1, 1)*V + np.arange(V)).ravel()
+            with np.errstate(divide='ignore'):
+                self.log_probability_table.reshape(-1, V)[context_keys] = np.log(self.get_token_probabilities(keys)).reshape(-1, V)
+        for rows in (getattr(self, "cdf_rows", None), getattr(self, "alias_rows", None), getattr(self, "top_chars_rows", None)):
+            if rows is not None:
+                rows.refresh(context_keys)
+
+
+    def save(self, path):
+        """
+        Writes the model to a binary file: its counts, parameters, vocabulary
+        and, when the model has one, its table of log probabilities.
+        See write_array_file for the layout of the file.
+
+        Args:
+            path [str]: file to write
+        """
+
+        arrays = dict()
+        def add_table(name, counts):
+            if not isinstance(counts, CountTable):
+                counts = CountTable.from_counts(counts, get_count_order(counts))
+            keys = counts.observed_keys()
+            if not counts.is_sparse and 2*len(keys) < counts.counts.size:
+                # mostly empty dense tables are smaller as sorted keys and counts
+                counts = CountTable(counts.lookup(keys), counts.order, keys=keys)
+            arrays[name + ".counts"] = counts.counts
+            if counts.is_sparse:
+                arrays[name + ".keys"] = counts.sparse_keys
+            return {"order": counts.order, "base": int(counts.base), "sparse": counts.is_sparse}
+
+        counts = dict()
+        for name in self.count_names:
+            value = getattr(self, name)
+            if isinstance(value, NGramTrie):
+                counts[name] = {"trie": value.n}
+                arrays.update({f"{name}.{key}": array for key, array in value.get_arrays().items()})
+            elif isinstance(value, list):
+                counts[name] = [add_table(f"{name}.{i}", table) for i, table in enumerate(value)]
+            else:
+                counts[name] = add_table(name, value)
+
+        if self.has_probability_table():
+            arrays["log_probability_table"] = self.get_log_probability_table()
+
+        header = {
+            "class": type(self).__name__,
+            "params": {name: getattr(self, name) for name in self.param_names},
+            "itos": get_vocab().get_itos(),
+            "counts": counts,
+        }
+        write_array_file(path, header, arrays)
+
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a model written by save. The arrays of the model are memory-mapped,
+        so loading does not read the file and processes loading the same file share its pages.
+        When no vocabulary is set, the vocabulary saved with the model becomes the global one.
+
+        Args:
+            path [str]: file to read
+
+        Returns:
+            model [NGramLanguageModel]: model of the class which was saved
+        """
+
+        header, arrays = read_array_file(path)
+        if data.vocab is None:
+            set_vocab(build_vocab_from_itos(header["itos"]))
+        elif header["itos"] != get_vocab().get_itos():
+            raise ValueError(f"{path} was saved with a different vocabulary")
+
+        classes = [cls]
+        for model_class in classes:
+            classes.extend(model_class.__subclasses__())
+        model_class = next((c for c in classes if c.__name__ == header["class"]), None)
+        if model_class is None:
+            raise ValueError(f"{path} holds a {header['class']}, which is not a {cls.__name__}")
+
+        def get_table(name, spec):
+            keys = arrays[name + ".keys"] if spec["sparse"] else None
+            return CountTable(arrays[name + ".counts"], spec["order"], keys=keys, base=spec["base"])
+
+        model = model_class.__new__(model_class)
+        for name, value in header["params"].items():
+            setattr(model, name, tuple(value) if isinstance(value, list) else value)
+        model.count_names = tuple(header["counts"])
+        for name, spec in header["counts"].items():
+            if "trie" in spec:
+                prefix = name + "."
+                trie_arrays = {key[len(prefix):]: array for key, array in arrays.items() if key.startswith(prefix)}
+                setattr(model, name, NGramTrie.from_arrays(trie_arrays, spec["trie"]))
+            elif isinstance(spec, list):
+                setattr(model, name, [get_table(f"{name}.{i}", table) for i, table in enumerate(spec)])
+            else:
+                setattr(model, name, get_table(name, spec))
+        model.log_probability_table = arrays.get("log_probability_table")
+        return model
+
+
+"""
+Implementaion of a Unigram Model without smoothing
+"""
+
+class UnigramModel(NGramLanguageModel):
+    n = 1
+    interpolated = False
+    count_names = ("unigram_counts",)
+    param_names = ("use_alias_tables",)
+
+    def __init__(self, train_text):
+        """
+        Initialise and train the model with train_text.
+
+        Args:
+            train_text [list of list]: list of tokenised names
+        """
+
+        # ADD YOUR CODE HERE
+
+        # BEGIN CODE
+        self.unigram_counts = get_unigram_counts(train_text)
+        # END CODE
+
+
+    def count_ngrams(self, text):
+        """
+        Counts the unigrams of a text (see NGramLanguageModel.count_ngrams)
+        """
+
+        return {"unigram_counts": get_unigram_counts(text)}
+
+
+    def get_next_char_probabilities(self):
+        """
+        Return a dictionary of probabilities for each char in the vocabulary
+
+        Returns:
+            key: char, value: probability
+        """
+
+        # ADD YOUR CODE HERE
+
+        # BEGIN CODE
+        next_char_probabilities = defaultdict(float)
+
+        total = sum(self.unigram_counts.values())
+        for k,c in self.unigram_counts.items():
+          next_char_probabilities[k]= c/total
+        self.next_char_probabilities = next_char_probabilities.copy()
+        # END CODE
+
+        return next_char_probabilities
+
+
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities
+
+        Args:
+            keys [np.ndarray]: vocab ids of the chars (see get_ngram_keys)
+
+        Returns:
+            probs [np.ndarray]: probability of every char
+        """
+
+        unigram_counts = self.get_count_table("unigram_counts", 1)
+        total = sum(self.unigram_counts.values())
+        return unigram_counts.lookup(keys)/total
+
+
+    def get_name_log_probability(self, name):
+        """
+        Calculates the log probability of name according to the n-gram model
+
+        Args:
+            name [list]: list of tokens
+
+        Returns:
+            Log probability of the name [float]
+        """
+
+        # ADD YOUR CODE HERE
+
+        # BEGIN CODE
+        if not hasattr(self,"next_char_probabilities"):self.get_next_char_probabilities()
+        name_log_probability = 0
+        if name[0]==START:name=name[1:]
+        for c in name:name_log_probability+=np.log(self.next_char_probabilities[c])
+        # END CODE
+
+
+        return name_log_probability
+
+
+"""
+Implementation of unigram model with Add-1 smoothing.
+
+"""
+class SmoothedUnigramModel(UnigramModel):
+
+    def __init__(self, train_text):
+        super().__init__(train_text)
+
+    # You should override ONLY those functions
+    # which calculate probability of a unigram.
+    # You can override get_next_char_probabilities
+    # or any other helper functions you use in UnigramModel
+    # to calculate unigram probabilities.
+
+    # Implement Laplace or Add-1 smoothing for the unigram model
+
+    # ADD YOUR CODE HERE
+    # BEGIN CODE
+    def get_next_char_probabilities(self):
+        """
+        Return a dictionary of probabilities for each char in the vocabulary with Add-1 smoothing
+
+        Returns:
+            key: char, value: probability
+        """
+
+        next_char_probabilities = dict()
+        V = len(get_vocab().get_stoi().keys())-1
+        total = sum(self.unigram_counts.values())
+        for k in get_vocab().get_stoi().keys():
+          if k==START:continue
+          next_char_probabilities[k]= (self.unigram_counts[k]+1)/(total+V)
+        self.next_char_probabilities = next_char_probabilities.copy()
+
+
+        return next_char_probabilities
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities with Add-1 smoothing
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        unigram_counts = self.get_count_table("unigram_counts", 1)
+        V = len(get_vocab().get_stoi().keys())-1
+        total = sum(self.unigram_counts.values())
+        probs = (unigram_counts.lookup(keys)+1)/(total+V)
+        probs[keys == get_vocab()[START]] = 0
+        return probs
+    # END CODE
+
+
+"""
+Implementation of a Bigram Model.
+"""
+
+class BigramModel(NGramLanguageModel):
+    n = 2
+    interpolated = False
+    count_names = ("bigram_counts",)
+    param_names = ("use_alias_tables",)
+
+    def __init__(self, train_text):
+        """
+        Initialise and train the model with train_text.
+
+        Args:
+            train_text [list of list]: list of tokenised names
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        self.bigram_counts = get_bigram_counts(train_text)
+        # END CODE
+
+
+    def count_ngrams(self, text):
+        """
+        Counts the bigrams of a text (see NGramLanguageModel.count_ngrams)
+        """
+
+        return {"bigram_counts": get_bigram_counts(text)}
+
+
+    def get_changed_contexts(self, new_counts):
+        """
+        Only the distributions following the first chars of the new bigrams change
+        """
+
+        return CountTable.from_counts(new_counts["bigram_counts"], 2).observed_keys() // len(get_vocab())
+
+    def get_next_char_probabilities(self):
+        """
+        Returns a probability distribution over all chars in the vocabulary.
+        Probability distribution should sum to one.
+
+        Returns:
+            P: dictionary or nested dictionary; Output format depends on n-gram
+            Examples:
+                for N=2 (bigram); dict[key:bigram_char1, value:dict[key:bigram_char2,value:probability of bigram]]
+                    > P["a"]["b"] = 0.0001 (which stands of P("b"|"a"))
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        next_char_probabilities = defaultdict(lambda:defaultdict(float))
+        for key1 in self.bigram_counts.keys():
+          total = sum(self.bigram_counts[key1].values())
+          for key2,count in self.bigram_counts[key1].items():
+            next_char_probabilities[key1][key2] = count/total
+        self.next_char_probabilities = next_char_probabilities
+        # END CODE
+
+        return next_char_probabilities
+
+
+    def get_distribution_contexts(self):
+        """
+        Returns the chars with a distribution in get_next_char_probabilities,
+        i.e. the first chars of the observed bigrams
+        """
+
+        return self.get_context_totals("bigram_counts", 2).observed_keys()
+
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities
+
+        Args:
+            keys [np.ndarray]: packed bigram keys (see get_ngram_keys)
+
+        Returns:
+            probs [np.ndarray]: probability of the second char of every bigram given the first one
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        bigram_counts = self.get_count_table("bigram_counts", 2)
+        totals = self.get_context_totals("bigram_counts", 2).lookup(keys // len(get_vocab()))
+        return np.where(totals > 0, bigram_counts.lookup(keys)/np.maximum(totals, 1), 0)
+
+
+    def get_name_log_probability(self, name):
+        """
+        Calculates the log probability of name according to the n-gram model.
+        Be careful with cases for which probability of the name is zero.
+
+        Args:
+            name [list]: list of tokens
+
+        Returns:
+            Log probability of the name [float]
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        if not hasattr(self,"next_char_probabilities"):self.get_next_char_probabilities()
+        name_log_probability=0
+        for i in range(len(name)-1):
+          name_log_probability+=np.log(self.next_char_probabilities[name[i]][name[i+1]])
+        # END CODE
+
+        return name_log_probability
+
+
+"""
+Implementation of a bigram model with laplace or add-k smoothing.
+
+"""
+
+class LaplaceSmoothedBigramModel(BigramModel):
+    # This class extends BigramModel.
+    param_names = BigramModel.param_names + ("k",)
+
+    def __init__(self, train_text, k):
+        super().__init__(train_text)
+        self.k = k # specify k for smoothing
+
+    # You should override ONLY those functions
+    # which calculate probability of a bigram.
+    # You can override get_next_char_probabilities
+    # or any other helper functions you use in BigramModel
+    # to calculate bigram probabilities.
+
+    # ADD YOUR CODE HERE
+    # BEGIN CODE
+    def get_next_char_probabilities(self):
+        """
+        Returns a probability distribution over all chars in the vocabulary.
+        Probability distribution should sum to one.
+
+        Returns:
+            P: dictionary or nested dictionary; Output format depends on n-gram
+            Examples:
+                for N=2 (bigram); dict[key:bigram_char1, value:dict[key:bigram_char2,value:probability of bigram]]
+                    > P["a"]["b"] = 0.0001 (which stands of P("b"|"a"))
+        """
+        V = len(get_vocab().get_stoi().keys())-1
+        next_char_probabilities = dict()
+        for key1 in get_vocab().get_stoi().keys():
+            if key1==END:continue
+            next_char_probabilities[key1]={}
+            total = sum(self.bigram_counts[key1].values()) if key1 in self.bigram_counts.keys() else 0
+            for key2 in get_vocab().get_stoi().keys():
+                if key2==START:continue
+                next_char_probabilities[key1][key2]=(self.bigram_counts[key1][key2]+self.k)/(total+self.k*V)
+        self.next_char_probabilities = next_char_probabilities
+
+        return next_char_probabilities
+
+    def get_distribution_contexts(self):
+        """
+        Returns the contexts of get_next_char_probabilities: every char but END
+        """
+
+        return self.get_contexts_without_end()
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities with add-k smoothing
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        bigram_counts = self.get_count_table("bigram_counts", 2)
+        V = len(get_vocab().get_stoi().keys())-1
+        totals = self.get_context_totals("bigram_counts", 2).lookup(keys // len(get_vocab()))
+        probs = (bigram_counts.lookup(keys)+self.k)/(totals+self.k*V)
+        probs[keys % len(get_vocab()) == get_vocab()[START]] = 0
+        return probs
+
+    @classmethod
+    def sweep_k(cls, train_text, text, ks):
+        """
+        Computes the perplexity on text of the add-k models trained on train_text
+        for every k at once, without building a model per k.
+        The held-out bigrams are reduced to their distinct (count, context total) pairs,
+        which are scored against all the k values by broadcasting.
+
+        Args:
+            train_text [list of list]: list of tokenised names to count the bigrams of
+            text [list of list]: list of tokenised names to compute the perplexity of
+            ks [np.ndarray]: values of k
+
+        Returns:
+            perplexities [np.ndarray]: perplexity for every k
+            best_k [float]: the k with the lowest perplexity
+        """
+
+        ks = np.asarray(ks, dtype=float)
+        bigram_counts = CountTable.from_counts(get_bigram_counts(train_text), 2)
+        V = len(get_vocab().get_stoi().keys())-1
+
+        ids, offsets = get_corpus_ids(text)
+        keys = get_ngram_keys(ids, offsets, 2)
+        counts = bigram_counts.lookup(keys)
+        totals = bigram_counts.get_context_totals().lookup(keys // len(get_vocab()))
+
+        pairs, weights = np.unique(np.stack([counts, totals], axis=1), axis=0, return_counts=True)
+        log_probs = np.log(pairs[:, :1] + ks) - np.log(pairs[:, 1:] + ks*V)
+        perplexities = np.exp(-(weights @ log_probs)/len(keys))
+        return perplexities, ks[np.argmin(perplexities)]
+    # END CODE
+
+
+"""
+Implementation of a bigram model with interpolation smoothing
+"""
+
+class InterpolationSmoothedBigramModel(BigramModel):
+    interpolated = True
+    count_names = ("bigram_counts", "unigram_counts")
+    param_names = BigramModel.param_names + ("lambda_1", "lambda_2")
+
+    def __init__(self, train_text, lambdas):
+        super().__init__(train_text)
+        self.lambda_1, self.lambda_2 = lambdas
+
+    # You should override ONLY those functions
+    # which calculate probability of a bigram.
+    # You can override get_next_char_probabilities
+    # or any other helper functions you use in BigramModel
+    # to calculate bigram probabilities.
+
+    # ADD YOUR CODE HERE
+
+    # BEGIN CODE
+        self.unigram_counts = get_unigram_counts(train_text)
+
+    def count_ngrams(self, text):
+        """
+        Counts the bigrams and unigrams of a text (see NGramLanguageModel.count_ngrams)
+        """
+
+        return {"bigram_counts": get_bigram_counts(text), "unigram_counts": get_unigram_counts(text)}
+
+    def get_changed_contexts(self, new_counts):
+        """
+        The unigram probabilities are interpolated in every context
+        """
+
+        return None
+
+    def get_next_char_probabilities(self):
+        """
+        Return a dictionary of probabilities for each char in the vocabulary with Add-1 smoothing
+
+        Returns:
+            key: char, value: probability
+        """
+
+        # ADD YOUR CODE HERE
+
+        # BEGIN CODE
+        uni_char_probabilities = dict()
+        total = sum(self.unigram_counts.values())
+        for k in get_vocab().get_stoi().keys():
+          if k==START:continue
+          uni_char_probabilities[k]= (self.unigram_counts[k])/(total)
+
+
+        bi_char_probabilities = dict()
+        next_char_probabilities = dict()
+        V = len(get_vocab().get_stoi().keys())-1
+        for key1 in get_vocab().get_stoi().keys():
+            if key1==END:continue
+            bi_char_probabilities[key1]={}
+            next_char_probabilities[key1]={}
+            total = sum(self.bigram_counts[key1].values()) if key1 in self.bigram_counts.keys() else 0
+            for key2 in get_vocab().get_stoi().keys():
+                if key2==START:continue
+                bi_char_probabilities[key1][key2]=(self.bigram_counts[key1][key2])/(total) if total!=0 else 1/V
+                next_char_probabilities[key1][key2]=0.95*self.lambda_1*bi_char_probabilities[key1][key2]+0.95*self.lambda_2*uni_char_probabilities[key2]+0.05*(self.lambda_1+self.lambda_2)*(1/V)
+        self.next_char_probabilities = next_char_probabilities.copy()
+
+        # END CODE
+
+        return next_char_probabilities
+
+    def get_distribution_contexts(self):
+        """
+        Returns the contexts of get_next_char_probabilities: every char but END
+        """
+
+        return self.get_contexts_without_end()
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities with interpolation smoothing
+        """
+
+        return self.get_component_probabilities(keys) @ np.array(self.get_lambdas())
+
+    def get_component_probabilities(self, keys):
+        """
+        Smoothed bigram and unigram probabilities, weighted by lambda_1 and lambda_2
+        (see NGramLanguageModel.get_component_probabilities)
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        unigram_counts = self.get_count_table("unigram_counts", 1)
+        bigram_counts = self.get_count_table("bigram_counts", 2)
+        V = len(get_vocab().get_stoi().keys())-1
+
+        uni_char_probabilities = unigram_counts.lookup(keys % len(get_vocab()))/sum(self.unigram_counts.values())
+        totals = self.get_context_totals("bigram_counts", 2).lookup(keys // len(get_vocab()))
+        bi_char_probabilities = np.where(totals > 0, bigram_counts.lookup(keys)/np.maximum(totals, 1), 1/V)
+
+        components = 0.95*np.stack([bi_char_probabilities, uni_char_probabilities], axis=1) + 0.05*(1/V)
+        components[keys % len(get_vocab()) == get_vocab()[START]] = 0
+        return components
+
+    def get_lambdas(self):
+        return (self.lambda_1, self.lambda_2)
+
+    def set_lambdas(self, lambdas):
+        self.lambda_1, self.lambda_2 = (float(l) for l in lambdas)
+        self.clear_caches()
+    # END CODE
+
+
+TRIGRAM_LAMBDAS = (0.4, 0.4, 0.2) # lambdas for interpolation smoothing in trigram models
+TRIGRAM_CACHE_SIZE = 2048 # number of contexts whose distribution is cached by a lazy trigram model
+
+
+"""
+Implementaion of a Trigram Model with interpolation smoothing.
+"""
+
+class LazyTrigramKeys(object):
+    """
+    Keys shared by the read-only views of the probabilities of a TrigramModel:
+    every char of the vocab except END can start a context
+    """
+
+    def keys(self):
+        return [char for char in get_vocab().get_stoi().keys() if char != END]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        return key in get_vocab().get_stoi() and key != END
+
+
+class LazyTrigramProbabilities(LazyTrigramKeys):
+    """
+    Read-only view of the probabilities of a TrigramModel,
+    which reads like the nested dictionary of get_next_char_probabilities
+    Example:
+        > P["a"]["b"]["c"] = 0.0001 (corresponding to P(c|ab))
+
+    The distribution following a context is only computed when it is first
+    asked for, and is kept in a bounded LRU cache.
+    """
+
+    def __init__(self, model, cache_size):
+        self.model = model
+        self.cache = LRUCache(cache_size)
+
+    def get_distribution(self, key1, key2):
+        P = self.cache.get((key1, key2))
+        if P is None:
+            P = self.model.get_context_probabilities(key1, key2)
+            self.cache.put((key1, key2), P)
+        return P
+
+    def __getitem__(self, key1):
+        return LazyTrigramContext(self, key1)
+
+
+class LazyTrigramContext(LazyTrigramKeys):
+    """
+    The distributions P[key1][key2] of a LazyTrigramProbabilities for a fixed key1
+    """
+
+    def __init__(self, probabilities, key1):
+        self.probabilities = probabilities
+        self.key1 = key1
+
+    def __getitem__(self, key2):
+        return self.probabilities.get_distribution(self.key1, key2)
+
+
+class TrigramModel(NGramLanguageModel):
+    n = 3
+    count_names = ("trigram_counts", "bigram_counts", "unigram_counts")
+    param_names = ("use_alias_tables", "lambda_1", "lambda_2", "lambda_3", "lazy", "cache_size")
+
+    def __init__(self, train_text, lazy=False, cache_size=TRIGRAM_CACHE_SIZE, lambdas=TRIGRAM_LAMBDAS):
+        """
+        Initialise and train the model with train_text.
+
+        Args:
+            train_text [list of list]: list of tokenised names
+            lazy [bool]: if True, get_next_char_probabilities does not build the
+                         full |V|^3 table; the distribution of a context is computed
+                         when it is first asked for (see LazyTrigramProbabilities)
+            cache_size [int]: number of distributions cached in lazy mode
+            lambdas [tuple]: lambdas for the trigram, bigram and unigram probabilities
+        """
+
+        # ADD YOUR CODE HERE
+        self.trigram_counts = get_trigram_counts(train_text)
+        self.bigram_counts = get_bigram_counts(train_text)
+        self.unigram_counts = get_unigram_counts(train_text)
+        self.lambda_1,self.lambda_2,self.lambda_3 = lambdas
+        self.lazy = lazy
+        self.cache_size = cache_size
+
+
+    def count_ngrams(self, text):
+        """
+        Counts the trigrams, bigrams and unigrams of a text (see NGramLanguageModel.count_ngrams)
+        """
+
+        return {"trigram_counts": get_trigram_counts(text),
+                "bigram_counts": get_bigram_counts(text),
+                "unigram_counts": get_unigram_counts(text)}
+
+
+    def get_next_char_probabilities(self):
+        """
+        Returns a probability distribution over all chars in the vocabulary.
+        Probability distribution should sum to one.
+
+        Returns:
+            P: dictionary or nested dictionary; Output format depends on n-gram
+            Examples:
+                for N=1 (unigram); dict[key:unigram,value:probability of unigram]
+                    > P["a"] = 0.0001
+                for N=2 (bigram); dict[key:bigram_char1, value:dict[key:bigram_char2,value:probability of bigram]]
+                    > P["a"]["b"] = 0.0001 (corresponding to P(b|a))
+                for N=3 (trigram); dict[dict[dict]]
+                    > P["a"]["b"]["c"] = 0.0001 (corresponding to P(c|ab))
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        if self.lazy:
+            if not isinstance(getattr(self, "next_char_probabilities", None), LazyTrigramProbabilities):
+                self.next_char_probabilities = LazyTrigramProbabilities(self, self.cache_size)
+            return self.next_char_probabilities
+
+        uni_char_probabilities = dict()
+        total = sum(self.unigram_counts.values())
+        for k in get_vocab().get_stoi().keys():
+          if k==START:continue
+          uni_char_probabilities[k]= (self.unigram_counts[k])/(total)
+
+
+        bi_char_probabilities = dict()
+        V = len(get_vocab().get_stoi().keys())-1
+        for key1 in get_vocab().get_stoi().keys():
+            if key1==END:continue
+            bi_char_probabilities[key1]={}
+            total = sum(self.bigram_counts[key1].values()) if key1 in self.bigram_counts.keys() else 0
+            for key2 in get_vocab().get_stoi().keys():
+                if key2==START:continue
+                bi_char_probabilities[key1][key2]=(self.bigram_counts[key1][key2])/(total) if total!=0 else 1/V
+
+
+        tri_char_probabilities = dict()
+        next_char_probabilities = dict()
+        for key1 in get_vocab().get_stoi().keys():
+            if key1==END:continue
+            tri_char_probabilities[key1]={}
+            next_char_probabilities[key1]={}
+            for key2 in get_vocab().get_stoi().keys():
+              if key2==END:continue
+              tri_char_probabilities[key1][key2]={}
+              next_char_probabilities[key1][key2]={}
+              total = sum(self.trigram_counts[key1][key2].values()) if (key1 in self.bigram_counts.keys()) and (key2 in self.bigram_counts[key1].keys()) else 0
+              for key3 in get_vocab().get_stoi().keys():
+                  if key3==START:continue
+                  tri_char_probabilities[key1][key2][key3]=(self.trigram_counts[key1][key2][key3])/(total) if total!=0 else 1/V
+                  next_char_probabilities[key1][key2][key3]=0.95*self.lambda_1*tri_char_probabilities[key1][key2][key3]+0.95*self.lambda_2*bi_char_probabilities[key2][key3]+0.95*self.lambda_3*uni_char_probabilities[key3]+0.05*(self.lambda_1+self.lambda_2+self.lambda_3)*(1/V)
+        self.next_char_probabilities = next_char_probabilities.copy()
+        # END CODE
+
+        return next_char_probabilities
+
+
+    def get_context_probabilities(self, key1, key2):
+        """
+        Returns the probability distribution of the char following key1 key2,
+        i.e. get_next_char_probabilities()[key1][key2], without building the
+        distributions of the other contexts.
+
+        Returns:
+            dict[key:char, value:probability of char after key1 key2]
+        """
+
+        if not hasattr(self, "uni_char_probabilities"):
+            uni_char_probabilities = dict()
+            total = sum(self.unigram_counts.values())
+            for k in get_vocab().get_stoi().keys():
+              if k==START:continue
+              uni_char_probabilities[k]= (self.unigram_counts[k])/(total)
+            self.uni_char_probabilities = uni_char_probabilities
+
+        V = len(get_vocab().get_stoi().keys())-1
+        bigram_row = dict(self.bigram_counts[key2].items()) if key2 in self.bigram_counts else {}
+        trigram_row = dict(self.trigram_counts[key1][key2].items()) if key1 in self.trigram_counts else {}
+        bi_total = sum(bigram_row.values())
+        tri_total = sum(trigram_row.values()) if (key1 in self.bigram_counts) and (key2 in self.bigram_counts[key1]) else 0
+
+        next_char_probabilities = dict()
+        for key3 in get_vocab().get_stoi().keys():
+            if key3==START:continue
+            tri = trigram_row.get(key3, 0)/tri_total if tri_total!=0 else 1/V
+            bi = bigram_row.get(key3, 0)/bi_total if bi_total!=0 else 1/V
+            next_char_probabilities[key3]=0.95*self.lambda_1*tri+0.95*self.lambda_2*bi+0.95*self.lambda_3*self.uni_char_probabilities[key3]+0.05*(self.lambda_1+self.lambda_2+self.lambda_3)*(1/V)
+
+        return next_char_probabilities
+
+
+    def get_distribution_contexts(self):
+        """
+        Returns the contexts of get_next_char_probabilities: every pair of chars without END
+        """
+
+        return self.get_contexts_without_end()
+
+
+    def get_token_probabilities(self, keys):
+        """
+        Vectorized version of get_next_char_probabilities
+
+        Args:
+            keys [np.ndarray]: packed trigram keys (see get_ngram_keys)
+
+        Returns:
+            probs [np.ndarray]: probability of the last char of every trigram given the first two
+        """
+
+        return self.get_component_probabilities(keys) @ np.array(self.get_lambdas())
+
+
+    def get_component_probabilities(self, keys):
+        """
+        Smoothed trigram, bigram and unigram probabilities, weighted by lambda_1,
+        lambda_2 and lambda_3 (see NGramLanguageModel.get_component_probabilities)
+        """
+
+        keys = np.asarray(keys, dtype=np.int64)
+        unigram_counts = self.get_count_table("unigram_counts", 1)
+        bigram_counts = self.get_count_table("bigram_counts", 2)
+        trigram_counts = self.get_count_table("trigram_counts", 3)
+        V = len(get_vocab().get_stoi().keys())-1
+        contexts = keys // len(get_vocab())
+        bigram_keys = keys % len(get_vocab())**2
+
+        uni_char_probabilities = unigram_counts.lookup(keys % len(get_vocab()))/sum(self.unigram_counts.values())
+
+        totals = self.get_context_totals("bigram_counts", 2).lookup(bigram_keys // len(get_vocab()))
+        bi_char_probabilities = np.where(totals > 0, bigram_counts.lookup(bigram_keys)/np.maximum(totals, 1), 1/V)
+
+        # contexts which are not an observed bigram (i.e. START START) use the uniform distribution
+        totals = np.where(bigram_counts.lookup(contexts) > 0, self.get_context_totals("trigram_counts", 3).lookup(contexts), 0)
+        tri_char_probabilities = np.where(totals > 0, trigram_counts.lookup(keys)/np.maximum(totals, 1), 1/V)
+
+        components = 0.95*np.stack([tri_char_probabilities, bi_char_probabilities, uni_char_probabilities], axis=1) + 0.05*(1/V)
+        components[keys % len(get_vocab()) == get_vocab()[START]] = 0
+        return components
+
+
+    def get_lambdas(self):
+        return (self.lambda_1, self.lambda_2, self.lambda_3)
+
+
+    def set_lambdas(self, lambdas):
+        self.lambda_1, self.lambda_2, self.lambda_3 = (float(l) for l in lambdas)
+        self.clear_caches()
+
+
+    def get_name_log_probability(self, name):
+        """
+        Calculates the log probability of name according to the n-gram model.
+        Be careful with cases for which probability of the name is zero.
+
+        Args:
+            name [list]: list of tokens
+
+        Returns:
+            Log probability of the name [float]
+        """
+
+        # ADD YOUR CODE HERE
+        # BEGIN CODE
+        if not hasattr(self,"next_char_probabilities"):self.get_next_char_probabilities()
+        name_log_probability=0
+        name = [START]+name
+        for i in range(len(name)-2):
+          name_log_probability+=np.log(self.next_char_probabilities[name[i]][name[i+1]][name[i+2]])
+        # END CODE
+        return name_log_probability
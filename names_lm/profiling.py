@@ -0,0 +1,194 @@
+"""
+Instrumentation of the evaluations: wall time, call counts and allocations of
+every phase of eval_ngram_model and eval_rnn_model, and of the model methods
+called in each phase. The measurements are sent as dictionaries to a sink,
+i.e. any callable taking one record, such as a list's append or JsonLinesSink.
+"""
+
+import sys
+import json
+import time
+import functools
+import contextlib
+import tracemalloc
+
+
+PROFILED_METHODS = ("get_next_char_probabilities", "get_perplexity", "generate_names",
+                    "get_most_likely_chars", "get_name_log_probability") # model methods whose calls are timed
+
+
+class JsonLinesSink(object):
+    """
+    Sink writing every record as one line of JSON to a file
+    """
+
+    def __init__(self, file=None):
+        """
+        Args:
+            file: path or open text file; None writes to stderr
+        """
+
+        self.path = file if isinstance(file, str) else None
+        self.file = sys.stderr if file is None else file
+
+
+    def __call__(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        if self.path is not None:
+            with open(self.path, "a") as file:
+                file.write(line)
+        else:
+            self.file.write(line)
+            self.file.flush()
+
+
+class EvalProfiler(object):
+    """
+    Records the phases of an evaluation and the calls of the model methods within them.
+
+    For every phase a record
+        {"kind": "phase", "phase", "model", "seconds", "calls", "allocated_bytes", "peak_bytes", **tags}
+    is sent to the sink, followed by one record
+        {"kind": "method", "phase", "model", "method", "calls", "seconds", **tags}
+    per model method called during the phase. "calls" of a phase is the number of
+    calls of the model methods; nested calls (e.g. generate_names calling
+    get_next_char_probabilities) are counted, and timed, at every level.
+    Allocations are only measured with trace_allocations, since tracemalloc slows
+    down python code and so skews the times; allocated_bytes and peak_bytes are
+    None otherwise. They only include memory allocated by python and numpy, not by torch.
+
+    Example:
+        records = []
+        eval_ngram_model(model, ..., profiler=EvalProfiler(records.append, job="nightly"))
+    """
+
+    def __init__(self, sink, trace_allocations=False, methods=PROFILED_METHODS, **tags):
+        """
+        Args:
+            sink [callable]: called with every record
+            trace_allocations [bool]: measure the allocations of every phase with tracemalloc,
+                                      which slows down python code (and so the timed phases)
+            methods [tuple[str]]: names of the model methods to time
+            tags: extra fields added to every record, e.g. the name of a job
+        """
+
+        self.sink = sink
+        self.trace_allocations = trace_allocations
+        self.methods = methods
+        self.tags = tags
+        self.model_name = None
+        self.phase_name = None
+        self.method_stats = {}
+
+
+    @contextlib.contextmanager
+    def instrument(self, model):
+        """
+        Times the calls of the methods of a model while the context is active,
+        by shadowing them with wrappers on the instance
+
+        Args:
+            model: n-gram model or neural trainer
+        """
+
+        self.model_name = type(model).__name__
+        wrapped = []
+        for name in self.methods:
+            method = getattr(model, name, None)
+            if callable(method) and name not in vars(model):
+                setattr(model, name, self.wrap_method(name, method))
+                wrapped.append(name)
+        try:
+            yield self
+        finally:
+            for name in wrapped:
+                delattr(model, name)
+            self.emit_method_stats()
+            self.model_name = None
+
+
+    def wrap_method(self, name, method):
+        """
+        Returns a wrapper of a bound method which counts and times its calls
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats = self.method_stats.setdefault(name, [0, 0.0])
+                stats[0] += 1
+                stats[1] += time.perf_counter() - start
+        return wrapper
+
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Measures a phase of an evaluation and sends its records to the sink when it ends
+
+        Args:
+            name [str]: name of the phase
+        """
+
+        self.emit_method_stats()
+        self.phase_name = name
+
+        started_tracing = False
+        if self.trace_allocations:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            seconds = time.perf_counter() - start
+            allocated_bytes = peak_bytes = None
+            if self.trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                allocated_bytes, peak_bytes = current - start_bytes, peak - start_bytes
+                if started_tracing:
+                    tracemalloc.stop()
+
+            self.emit({"kind": "phase", "phase": name, "seconds": seconds,
+                       "calls": sum(calls for calls, _ in self.method_stats.values()),
+                       "allocated_bytes": allocated_bytes, "peak_bytes": peak_bytes})
+            self.emit_method_stats()
+            self.phase_name = None
+
+
+    def emit_method_stats(self):
+        """
+        Sends the records of the method calls since the last ones were sent
+        """
+
+        for method, (calls, seconds) in self.method_stats.items():
+            self.emit({"kind": "method", "phase": self.phase_name, "method": method,
+                       "calls": calls, "seconds": seconds})
+        self.method_stats = {}
+
+
+    def emit(self, record):
+        self.sink({**record, "model": self.model_name, **self.tags})
+
+
+def profile_phase(profiler, name):
+    """
+    Returns the context measuring a phase, or a context doing nothing if profiler is None
+    """
+
+    return contextlib.nullcontext() if profiler is None else profiler.phase(name)
+
+
+def profile_model(profiler, model):
+    """
+    Returns the context timing the methods of a model, or a context doing nothing if profiler is None
+    """
+
+    return contextlib.nullcontext() if profiler is None else profiler.instrument(model)
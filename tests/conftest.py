@@ -0,0 +1,100 @@
+"""
+Fixtures shared by the tests of the n-gram models: small synthetic corpora,
+their vocabulary (set as the global vocabulary of the models for every test),
+and one factory per kind of model.
+
+Run the tests from the root of the repository with: python -m pytest
+"""
+
+import functools
+
+import numpy as np
+import pytest
+
+from names_lm import data, ngram
+from names_lm.data import build_vocab, process_data_for_input, set_vocab
+
+
+ALPHABET = "abcdefghijklmn" # chars of the synthetic names
+NUM_NAMES = 600 # number of names of the training corpus
+NAME_LENGTHS = (2, 9) # smallest and largest (excluded) length of a synthetic name
+SEQUENCES = ([], ["a"], ["a", "b"], ["n", "m", "a"]) # sequences whose most likely chars are compared
+
+MODEL_FACTORIES = {
+    "UnigramModel": ngram.UnigramModel,
+    "SmoothedUnigramModel": ngram.SmoothedUnigramModel,
+    "BigramModel": ngram.BigramModel,
+    "LaplaceSmoothedBigramModel": functools.partial(ngram.LaplaceSmoothedBigramModel, k=0.5),
+    "InterpolationSmoothedBigramModel": functools.partial(ngram.InterpolationSmoothedBigramModel,
+                                                          lambdas=(0.7, 0.3)),
+    "TrigramModel": ngram.TrigramModel,
+    "TrigramModel-lazy": functools.partial(ngram.TrigramModel, lazy=True),
+    "NGramLanguageModel-4": functools.partial(ngram.NGramLanguageModel, n=4),
+    "NGramLanguageModel-4-trie": functools.partial(ngram.NGramLanguageModel, n=4, context_store="trie"),
+    "NGramLanguageModel-6": functools.partial(ngram.NGramLanguageModel, n=6),
+} # builds every kind of model from a train text
+
+
+def make_names(num_names, seed):
+    """
+    Returns random names over ALPHABET
+    """
+
+    rng = np.random.default_rng(seed)
+    chars = np.array(list(ALPHABET))
+    return ["".join(rng.choice(chars, size=rng.integers(*NAME_LENGTHS))) for _ in range(num_names)]
+
+
+def flatten_probabilities(P, context=()):
+    """
+    Returns the probabilities of the (nested) dictionary of get_next_char_probabilities,
+    keyed by the tuple of the context and the char
+    """
+
+    probabilities = dict()
+    for char in P:
+        value = P[char]
+        if hasattr(value, "keys"):
+            probabilities.update(flatten_probabilities(value, context + (char,)))
+        else:
+            probabilities[context + (char,)] = float(value)
+    return probabilities
+
+
+@pytest.fixture(scope="session")
+def vocab():
+    # the chars of the names only, rather than all the ascii chars, keep the tables small
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(data, "vocab_from_ascii", False)
+        return build_vocab(make_names(NUM_NAMES, 0))
+
+
+@pytest.fixture(autouse=True)
+def global_vocab(vocab):
+    set_vocab(vocab)
+    return vocab
+
+
+@pytest.fixture(scope="session")
+def train_text(vocab):
+    return process_data_for_input(make_names(NUM_NAMES, 0), vocab)
+
+
+@pytest.fixture(scope="session")
+def extra_text(vocab):
+    return process_data_for_input(make_names(NUM_NAMES // 2, 1), vocab)
+
+
+@pytest.fixture(params=list(MODEL_FACTORIES))
+def make_model(request):
+    return MODEL_FACTORIES[request.param]
+
+
+@pytest.fixture(params=[True, False], ids=["arrays", "dicts"])
+def count_with_arrays(request, monkeypatch):
+    """
+    Counts the ngrams of the models with arrays, or with nested dictionaries
+    """
+
+    monkeypatch.setattr(ngram, "COUNT_WITH_ARRAYS", request.param)
+    return request.param
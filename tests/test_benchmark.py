@@ -0,0 +1,34 @@
+"""
+Comparing two benchmark runs must pair their records, including operations
+too fast to be timed.
+"""
+
+import json
+
+from names_lm import benchmark
+
+
+def make_results(seconds):
+    return {"records": [{"model": model, "operation": operation, "num_names": 100, "best_seconds": best_seconds}
+                        for (model, operation), best_seconds in seconds.items()]}
+
+
+def test_compare_results():
+    base = make_results({("BigramModel", "fit"): 2.0, ("BigramModel", "perplexity"): 1.0, (None, "read"): 1.0})
+    results = make_results({("BigramModel", "fit"): 0.5, ("BigramModel", "perplexity"): 0.0,
+                            ("TrigramModel", "fit"): 1.0})
+    assert benchmark.compare_results(base, results) == [("BigramModel", "fit", 100, 2.0, 0.5, 4.0),
+                                                        ("BigramModel", "perplexity", 100, 1.0, 0.0, None)]
+
+
+def test_main_prints_the_comparison(tmp_path, monkeypatch, capsys):
+    base = make_results({("BigramModel", "fit"): 2.0, ("BigramModel", "perplexity"): 1.0})
+    results = make_results({("BigramModel", "fit"): 0.5, ("BigramModel", "perplexity"): 0.0})
+    path = tmp_path / "base.json"
+    path.write_text(json.dumps(base))
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda *args, **kwargs: results)
+
+    benchmark.main(["--output", str(tmp_path / "results.json"), "--compare", str(path)])
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[0].endswith("x4.00")
+    assert lines[1].endswith("n/a")
@@ -0,0 +1,112 @@
+"""
+EncodedCorpus.from_names must encode names like process_data_for_input, on the
+code point table fast path as well as on the fallback path, and the corpora
+cached by get_tokenised_text_and_vocab must be those parsed from the csv file.
+"""
+
+import numpy as np
+import pytest
+
+from names_lm import data
+from names_lm.data import EncodedCorpus, build_vocab, get_tokenised_text_and_vocab, process_data_for_input
+
+pd = pytest.importorskip("pandas")
+
+
+NAMES = ["anna", "Zoë", "a中b", "", "x y", "O'Neil", "ñandú"] # names with chars out of the ascii vocab
+
+
+def assert_same_corpus(corpus, expected):
+    assert len(corpus) == len(expected)
+    assert list(corpus) == expected
+
+
+@pytest.fixture(params=[True, False], ids=["ascii", "names"])
+def names_vocab(request, monkeypatch):
+    """
+    The ascii vocabulary, or the vocabulary of the chars of NAMES but the last (beyond code point 255)
+    """
+
+    monkeypatch.setattr(data, "vocab_from_ascii", request.param)
+    return build_vocab(NAMES[:-1])
+
+
+def test_from_names_equals_process_data_for_input(names_vocab):
+    # only the ascii vocabulary has a code point table
+    assert (EncodedCorpus.get_char_table(names_vocab) is not None) == data.vocab_from_ascii
+    assert_same_corpus(EncodedCorpus.from_names(NAMES, names_vocab), process_data_for_input(NAMES, names_vocab))
+
+
+def test_from_names_fallback_equals_process_data_for_input(names_vocab, monkeypatch):
+    monkeypatch.setattr(EncodedCorpus, "get_char_table", staticmethod(lambda vocab: None))
+    assert_same_corpus(EncodedCorpus.from_names(NAMES, names_vocab), process_data_for_input(NAMES, names_vocab))
+
+
+@pytest.mark.parametrize("names", [[""], [""]*3, [], ["a\0", "\0"], ["ab\0c", "d"]],
+                         ids=["empty", "empties", "none", "nul", "inner-nul"])
+def test_from_names_edge_cases(names, monkeypatch):
+    monkeypatch.setattr(data, "vocab_from_ascii", True)
+    vocab = build_vocab([])
+    assert_same_corpus(EncodedCorpus.from_names(names, vocab), process_data_for_input(names, vocab))
+
+
+def test_from_names_of_a_series(names_vocab):
+    series = pd.Series(NAMES + [12], index=np.arange(len(NAMES)+1)*2)
+    assert_same_corpus(EncodedCorpus.from_names(series, names_vocab),
+                       process_data_for_input(series.astype(str), names_vocab))
+
+
+def write_csv(directory, names):
+    pd.DataFrame({"Name": names}).to_csv(directory / "train_data.csv")
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(data, "CORPUS_CACHE", True)
+    monkeypatch.setattr(data, "CORPUS_CACHE_DIR", None)
+    write_csv(tmp_path, NAMES[:3] + ["bob", "carl"])
+    return tmp_path
+
+
+@pytest.mark.parametrize("from_ascii", [True, False], ids=["ascii", "names"])
+@pytest.mark.parametrize("with_vocab", [False, True], ids=["new-vocab", "given-vocab"])
+def test_cache_hit_equals_cache_miss(data_dir, from_ascii, with_vocab, monkeypatch):
+    monkeypatch.setattr(data, "vocab_from_ascii", from_ascii)
+    given_vocab = build_vocab(["abc"]) if with_vocab else None
+
+    corpus, vocab = get_tokenised_text_and_vocab("train", given_vocab)
+    assert len(list((data_dir / "corpus_cache").iterdir())) == 1
+
+    # a hit does not read the csv file
+    monkeypatch.setattr(data, "read_names", pytest.fail)
+    cached_corpus, cached_vocab = get_tokenised_text_and_vocab("train", given_vocab)
+    assert cached_vocab.get_itos() == vocab.get_itos()
+    assert data.get_vocab() is cached_vocab
+    assert np.array_equal(cached_corpus.ids, corpus.ids)
+    assert cached_corpus.ids.dtype == corpus.ids.dtype
+    assert np.array_equal(cached_corpus.offsets, corpus.offsets)
+    assert list(cached_corpus) == list(corpus)
+
+
+def test_editing_the_csv_invalidates_the_cache(data_dir, monkeypatch):
+    monkeypatch.setattr(data, "vocab_from_ascii", False)
+    get_tokenised_text_and_vocab("train")
+
+    write_csv(data_dir, ["dora", "eve"])
+    corpus, vocab = get_tokenised_text_and_vocab("train")
+    assert list(corpus) == process_data_for_input(["dora", "eve"], vocab)
+    assert vocab.get_itos() == build_vocab(["dora", "eve"]).get_itos()
+    assert len(list((data_dir / "corpus_cache").iterdir())) == 2
+
+
+def test_corpus_cache_dir_and_disabled_cache(data_dir, tmp_path_factory, monkeypatch):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setattr(data, "CORPUS_CACHE_DIR", str(cache_dir))
+    get_tokenised_text_and_vocab("train")
+    assert len(list(cache_dir.iterdir())) == 1
+    assert not (data_dir / "corpus_cache").exists()
+
+    monkeypatch.setattr(data, "CORPUS_CACHE", False)
+    monkeypatch.setattr(data, "read_array_file", pytest.fail)
+    get_tokenised_text_and_vocab("train")
@@ -0,0 +1,75 @@
+"""
+Counting the ngrams of a corpus in shards, with a pool of forked processes,
+must give the counts of the whole corpus counted in this process. The count
+tables must read like the nested dictionaries of counts.
+"""
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from names_lm import ngram
+
+
+def assert_same_counts(table, expected):
+    assert table.order == expected.order
+    assert table.is_sparse == expected.is_sparse
+    if expected.is_sparse:
+        assert np.array_equal(table.sparse_keys, expected.sparse_keys)
+    assert np.array_equal(table.counts, expected.counts)
+
+
+@pytest.mark.parametrize("sparse", [False, True], ids=["dense", "sparse"])
+@pytest.mark.parametrize("order", [1, 2, 3])
+@pytest.mark.parametrize("workers", [3, 4])
+def test_parallel_counts_equal_serial_counts(train_text, workers, order, sparse, monkeypatch):
+    expected = ngram.count_ngram_table(train_text, order, sparse=sparse, workers=1)
+    monkeypatch.setattr(ngram, "MIN_NAMES_PER_WORKER", 50)
+    assert_same_counts(ngram.count_ngram_table(train_text, order, sparse=sparse, workers=workers), expected)
+
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_small_corpus_is_counted_in_this_process(train_text, order, monkeypatch):
+    expected = ngram.count_ngram_table(train_text, order, workers=1)
+    assert len(train_text) < ngram.MIN_NAMES_PER_WORKER
+    monkeypatch.setattr(multiprocessing, "get_context", pytest.fail)
+    assert_same_counts(ngram.count_ngram_table(train_text, order, workers=4), expected)
+
+
+def test_counts_in_this_process_without_fork(train_text, monkeypatch):
+    expected = ngram.count_ngram_table(train_text, 3, workers=1)
+    monkeypatch.setattr(ngram, "MIN_NAMES_PER_WORKER", 50)
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    monkeypatch.setattr(multiprocessing, "get_context", pytest.fail)
+    assert_same_counts(ngram.count_ngram_table(train_text, 3, workers=4), expected)
+
+
+@pytest.mark.parametrize("sparse", [False, True], ids=["dense", "sparse"])
+def test_count_table_reads_like_nested_dictionaries(train_text, sparse, monkeypatch):
+    monkeypatch.setattr(ngram, "COUNT_WITH_ARRAYS", False)
+    expected = ngram.get_trigram_counts(train_text)
+    table = ngram.count_ngram_table(train_text, 3, sparse=sparse, workers=1)
+
+    assert sorted(table.keys()) == sorted(expected.keys())
+    for char1, row in expected.items():
+        assert sorted(table[char1].keys()) == sorted(row.keys())
+        for char2, counts in row.items():
+            assert dict(table[char1][char2].items()) == counts
+            for char3, count in counts.items():
+                assert type(table[char1][char2][char3]) is int
+                assert table[char1][char2][char3] == count
+    assert table["a"]["b"]["<unknown char>"] == 0
+    assert table["<unknown char>"]["a"]["b"] == 0
+
+
+@pytest.mark.parametrize("sparse", [False, True], ids=["dense", "sparse"])
+def test_count_table_views_follow_added_counts(train_text, extra_text, sparse):
+    table = ngram.count_ngram_table(train_text, 2, sparse=sparse, workers=1)
+    assert table["a"] is table["a"]
+    row = dict(table["a"].items())
+
+    table.add(ngram.count_ngram_table(extra_text, 2, sparse=sparse, workers=1))
+    expected = ngram.count_ngram_table(train_text + extra_text, 2, sparse=sparse, workers=1)
+    assert dict(table["a"].items()) == dict(expected["a"].items()) != row
+    assert table.keys() == expected.keys()
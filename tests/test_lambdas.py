@@ -0,0 +1,77 @@
+"""
+The interpolation weights fitted on held-out text must be a distribution over the
+components, and must score the held-out text at least as well as the default weights.
+"""
+
+import numpy as np
+import pytest
+
+from names_lm import ngram
+
+from tests.conftest import MODEL_FACTORIES
+
+
+INTERPOLATED_MODELS = ["InterpolationSmoothedBigramModel", "TrigramModel", "TrigramModel-lazy", "NGramLanguageModel-4",
+                       "NGramLanguageModel-4-trie", "NGramLanguageModel-6"] # keys of MODEL_FACTORIES
+OTHER_MODELS = [name for name in MODEL_FACTORIES if name not in INTERPOLATED_MODELS] # keys of MODEL_FACTORIES
+
+
+def get_components(seed, num_tokens=500, num_components=3):
+    """
+    Returns random probabilities of held-out tokens under some components
+    """
+
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.01, 1, size=(num_tokens, num_components))
+
+
+@pytest.mark.parametrize("fit", [ngram.fit_lambdas_em, ngram.fit_lambdas_grid])
+def test_fitted_lambdas_are_a_distribution(fit):
+    lambdas = fit(get_components(0))
+    assert len(lambdas) == 3
+    assert np.all(lambdas >= 0)
+    assert np.isclose(lambdas.sum(), 1)
+
+
+@pytest.mark.parametrize("fit", [ngram.fit_lambdas_em, ngram.fit_lambdas_grid])
+def test_fitted_lambdas_beat_equal_lambdas(fit):
+    components = get_components(1)
+    log_likelihood = np.log(components @ fit(components)).sum()
+    assert log_likelihood >= np.log(components @ np.full(3, 1/3)).sum()
+
+
+def test_grid_search_finds_the_best_point_of_the_grid():
+    components = get_components(2)
+    grid = [(a/10, b/10, 1-(a+b)/10) for a in range(11) for b in range(11-a)]
+    best = max(grid, key=lambda lambdas: np.log(components @ np.array(lambdas)).sum())
+    assert np.allclose(ngram.fit_lambdas_grid(components, step=0.1, batch_size=7), best)
+
+
+def test_fitting_ignores_start_tokens():
+    components = get_components(3)
+    padded = np.vstack([components, np.zeros((10, 3))])
+    assert np.allclose(ngram.fit_lambdas_em(padded), ngram.fit_lambdas_em(components))
+    assert np.allclose(ngram.fit_lambdas_grid(padded), ngram.fit_lambdas_grid(components))
+
+
+@pytest.mark.parametrize("method", ["em", "grid"])
+@pytest.mark.parametrize("name", INTERPOLATED_MODELS)
+def test_tune_lambdas_does_not_raise_held_out_perplexity(name, method, train_text, extra_text):
+    model = MODEL_FACTORIES[name](train_text)
+    perplexity = model.get_perplexity(extra_text)
+
+    lambdas = model.tune_lambdas(extra_text, method=method)
+    assert model.get_lambdas() == lambdas
+    assert np.isclose(sum(lambdas), 1)
+    assert model.get_perplexity(extra_text) <= perplexity * (1 + 1e-9)
+
+
+@pytest.mark.parametrize("name", OTHER_MODELS)
+def test_tune_lambdas_rejects_models_without_interpolation(name, train_text, extra_text):
+    with pytest.raises(ValueError):
+        MODEL_FACTORIES[name](train_text).tune_lambdas(extra_text)
+
+
+def test_tune_lambdas_rejects_unknown_methods(train_text, extra_text):
+    with pytest.raises(ValueError):
+        ngram.TrigramModel(train_text).tune_lambdas(extra_text, method="newton")
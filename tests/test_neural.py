@@ -0,0 +1,198 @@
+"""
+The data loaders of the neural models must serve the ngrams and names of the
+list based loaders they replace, also from worker processes. The distributions
+cached by NeuralNGramTrainer must follow the weights of the model, and its
+batched perplexity must be the one of the loop over the windows.
+"""
+
+import importlib
+import os
+import pickle
+import sys
+from functools import partial
+
+import numpy as np
+import pytest
+
+# the notebook code.py at the root of the repository shadows the standard library
+# module code, which torch imports: import the standard library one first (see benchmark.main)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if "code" not in sys.modules:
+    path = sys.path[:]
+    sys.path[:] = [p for p in path if os.path.abspath(p or os.curdir) != ROOT]
+    try:
+        importlib.import_module("code")
+    finally:
+        sys.path[:] = path
+
+torch = pytest.importorskip("torch")
+
+from names_lm import neural
+from names_lm.data import START, EncodedCorpus
+
+
+def get_ngrams(text, ngram):
+    """
+    The ngrams of the list based get_dataloader: every name is padded with START tokens
+    (one less if it starts with START) and cut into all its windows of ngram tokens
+    """
+
+    ngrams = []
+    for name in text:
+        name = [START]*(ngram-2 if name[0] == START else ngram-1) + name
+        ngrams.extend(name[i:i+ngram] for i in range(len(name) - ngram + 1))
+    return ngrams
+
+
+def get_windows(dataloader):
+    """
+    Returns the (context, target) pairs of the batches of an n-gram data loader, in order
+    """
+
+    return [(tuple(x.tolist()), int(y)) for xb, yb in dataloader for x, y in zip(xb, yb)]
+
+
+@pytest.fixture(scope="module")
+def text(train_text):
+    # names without START, and names shorter than the ngrams, are padded differently
+    return train_text[:200] + [["a"], [START, "b"], ["c", "d", "e"]]
+
+
+@pytest.mark.parametrize("ngram", [2, 3, 5])
+def test_ngram_loader_equals_list_loader(text, vocab, ngram):
+    expected = [(tuple(vocab(sequence[:-1])), vocab[sequence[-1]]) for sequence in get_ngrams(text, ngram)]
+
+    dataloader = neural.get_dataloader(text, vocab, ngram, batch_size=64, shuffle=False)
+    batch_sizes = [len(yb) for xb, yb in dataloader]
+    assert batch_sizes == [64]*(len(expected) // 64) + ([len(expected) % 64] if len(expected) % 64 else [])
+    assert get_windows(dataloader) == expected
+
+    torch.manual_seed(0)
+    shuffled = get_windows(neural.get_dataloader(text, vocab, ngram, batch_size=64, shuffle=True))
+    assert shuffled != expected
+    assert sorted(shuffled) == sorted(expected)
+
+
+def test_ngram_loader_of_an_encoded_corpus(text, vocab):
+    corpus = EncodedCorpus.from_tokens(text, vocab)
+    assert get_windows(neural.get_dataloader(corpus, vocab, 4, batch_size=64, shuffle=False)) == \
+        get_windows(neural.get_dataloader(text, vocab, 4, batch_size=64, shuffle=False))
+
+
+def get_names(dataloader):
+    """
+    Returns the (input, output) id lists of the batches of an RNN data loader, in order
+    """
+
+    return [(x.tolist(), y.tolist()) for xb, yb in dataloader for x, y in zip(xb, yb)]
+
+
+def test_rnn_loader_equals_list_loader(text, vocab):
+    expected = [(vocab(name)[:-1], vocab(name)[1:]) for name in text]
+    assert get_names(neural.get_dataloader_for_rnn(text, vocab, 16, False)) == expected
+
+
+@pytest.mark.filterwarnings("ignore:This DataLoader will create")
+def test_loaders_with_worker_processes(text, vocab):
+    ngram_loader = neural.get_dataloader(text, vocab, 4, batch_size=64, shuffle=False,
+                                         num_workers=2, prefetch_factor=1, persistent_workers=True)
+    assert get_windows(ngram_loader) == get_windows(neural.get_dataloader(text, vocab, 4, 64, False))
+
+    rnn_loader = neural.get_dataloader_for_rnn(text, vocab, 16, False, num_workers=2)
+    assert get_names(rnn_loader) == get_names(neural.get_dataloader_for_rnn(text, vocab, 16, False))
+
+
+def test_loaders_can_be_sent_to_spawned_workers(text, vocab):
+    # spawned workers receive the dataset, the sampler and the collate function pickled
+    collate_fn = pickle.loads(pickle.dumps(partial(neural.collate_for_rnn, text_pipeline=vocab)))
+    assert [x.tolist() for x in collate_fn(text[:3])[0]] == [vocab(name)[:-1] for name in text[:3]]
+
+    rnn_loader = neural.get_dataloader_for_rnn(text, vocab, 16, False)
+    assert pickle.loads(pickle.dumps(rnn_loader.collate_fn))(text[:3])[1][0].tolist() == vocab(text[0])[1:]
+
+    ngram_loader = neural.get_dataloader(text, vocab, 4, batch_size=64, shuffle=False)
+    dataset = pickle.loads(pickle.dumps(ngram_loader.dataset))
+    sampler = pickle.loads(pickle.dumps(ngram_loader.sampler))
+    assert get_windows(dataset[indices] for indices in sampler) == get_windows(ngram_loader)
+
+
+def make_trainer(vocab, train_dataloader, ngram=4, **options):
+    torch.manual_seed(0)
+    model = neural.FNN_LM(vocab_size=len(vocab), emb_size=8, hid_size=16, ngram=ngram)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=1e-2)
+    return neural.NeuralNGramTrainer(ngram=ngram, model=model, optimizer=optimizer,
+                                     criterion=torch.nn.functional.cross_entropy,
+                                     train_dataloader=train_dataloader, valid_dataloader=train_dataloader,
+                                     epochs=1, use_cuda=False, vocab=vocab, model_dir=None, **options)
+
+
+def test_distribution_cache_counts_hits_and_misses(text, vocab):
+    trainer = make_trainer(vocab, None, cache_distributions=True, cache_size=2)
+    assert make_trainer(vocab, None).get_cache_stats() is None
+
+    for sequence in (["a"], ["a"], ["b"], ["a"], ["c"], ["a"], ["b"]):
+        trainer.get_most_likely_chars(sequence, 3)
+    # ["c"] evicts ["b"], the least recently used context, while ["a"] stays cached
+    assert trainer.get_cache_stats() == {"hits": 3, "misses": 4, "size": 2, "maxsize": 2, "invalidations": 0}
+
+    trainer.clear_cache()
+    assert trainer.get_cache_stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 2, "invalidations": 0}
+
+
+def test_optimizer_steps_invalidate_the_cache(text, vocab):
+    train_dataloader = neural.get_dataloader(text, vocab, 4, batch_size=64, shuffle=False)
+    trainer = make_trainer(vocab, train_dataloader, cache_distributions=True)
+    context = [START, START, START]
+
+    before = trainer.get_next_char_probabilities()
+    assert trainer.get_next_char_probabilities() == before
+    assert trainer.get_cache_stats()["hits"] == 1
+
+    trainer.model.train()
+    trainer.train_batch(next(iter(train_dataloader)))
+    trainer.model.eval()
+    assert trainer.weights_updates == 1
+
+    after = trainer.get_context_distribution(context)
+    assert trainer.get_cache_stats()["invalidations"] == 1
+    assert trainer.get_cache_stats()["size"] == 1
+    assert not np.allclose(after, [before[char] for char in vocab.get_itos()])
+    assert np.array_equal(after, trainer.compute_distribution(tuple(vocab(context))))
+
+    # in-place updates outside train_batch, e.g. loading weights, also invalidate the cache
+    state = {name: torch.zeros_like(value) for name, value in trainer.model.state_dict().items()}
+    trainer.model.load_state_dict(state)
+    assert np.allclose(trainer.get_context_distribution(context), 1/len(vocab))
+    assert trainer.get_cache_stats()["invalidations"] == 2
+
+
+def get_perplexity_of_windows(trainer, text):
+    """
+    Perplexity computed like the loop of the list based get_perplexity: the softmax
+    probability of the target of every window of the data loader, in float32
+    """
+
+    trainer.model.eval()
+    log_probability, num_windows = 0.0, 0
+    with torch.no_grad():
+        for xb, yb in neural.get_dataloader(text, trainer.vocab, trainer.ngram, 256, False):
+            probs = torch.softmax(trainer.model(xb), dim=1)[torch.arange(len(yb)), yb]
+            log_probability += np.log(probs.numpy()).sum()
+            num_windows += len(yb)
+    return np.exp(-log_probability/num_windows)
+
+
+@pytest.mark.parametrize("batch_size", [100, neural.PERPLEXITY_BATCH_SIZE])
+def test_perplexity_equals_window_loop(text, vocab, batch_size, monkeypatch):
+    monkeypatch.setattr(neural, "PERPLEXITY_BATCH_SIZE", batch_size)
+    train_dataloader = neural.get_dataloader(text, vocab, 4, batch_size=64, shuffle=True)
+    trainer = make_trainer(vocab, train_dataloader)
+    trainer.train_epoch(train_dataloader)
+
+    # float32 softmax and float64 log-softmax sums differ in the last digits
+    perplexity = trainer.get_perplexity(text)
+    assert np.isclose(perplexity, get_perplexity_of_windows(trainer, text), rtol=1e-5)
+
+    # scoring the text again reuses its encoding; an encoded corpus is encoded anew
+    assert trainer.get_perplexity(text) == perplexity
+    assert np.isclose(trainer.get_perplexity(EncodedCorpus.from_tokens(text, vocab)), perplexity, rtol=1e-12)
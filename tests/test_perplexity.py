@@ -0,0 +1,31 @@
+"""
+The vectorized get_perplexity of the n-gram models must give the perplexity
+computed name by name from get_name_log_probability.
+"""
+
+import numpy as np
+
+from names_lm.data import START, EncodedCorpus
+
+
+def get_perplexity_of_names(model, text):
+    """
+    Perplexity computed from the log probability of every name
+    """
+
+    log_probability = sum(model.get_name_log_probability(name) for name in text)
+    num_tokens = sum(len(name)-1 if name[0] == START else len(name) for name in text)
+    return np.exp(-log_probability/num_tokens)
+
+
+def test_perplexity_equals_name_log_probabilities(make_model, count_with_arrays, train_text):
+    model = make_model(train_text)
+    text = train_text[:200]
+    assert np.isclose(model.get_perplexity(text), get_perplexity_of_names(model, text), rtol=1e-9)
+
+
+def test_perplexity_of_encoded_corpus(make_model, train_text, vocab):
+    model = make_model(train_text)
+    text = train_text[:200]
+    encoded = EncodedCorpus.from_tokens(text, vocab)
+    assert np.isclose(model.get_perplexity(encoded), model.get_perplexity(text), rtol=1e-12)
@@ -0,0 +1,84 @@
+"""
+Names sampled from the alias tables or from the cumulative distributions must
+follow the distributions of the model, and the most likely chars must be the
+chars of the distributions sorted by decreasing probability.
+"""
+
+import numpy as np
+import pytest
+
+from names_lm import ngram
+from names_lm.data import START, get_vocab
+
+from tests.conftest import SEQUENCES
+
+
+NUM_SAMPLES = 20000 # number of chars sampled after every context
+
+
+def get_sequences(text):
+    """
+    Returns the sequences of SEQUENCES and some prefixes of the names of a text
+    """
+
+    return list(SEQUENCES) + [[char for char in name[:i] if char != START] for name in text[:10] for i in (2, 4)]
+
+
+@pytest.mark.parametrize("probs", [[0.5, 0.5], [0.1, 0.2, 0.3, 0.4], [0, 0.7, 0, 0.2, 0.1], [1, 0, 0], [2, 6, 2]])
+def test_alias_table_holds_the_distribution(probs):
+    probs = np.array(probs, dtype=float)
+    accept, alias = ngram.build_alias_table(probs)
+    assert np.all((accept >= 0) & (accept <= 1))
+
+    # char i is kept with probability accept[i]/V, and taken instead of j with probability (1-accept[j])/V
+    V = len(probs)
+    masses = accept/V + np.bincount(alias, weights=(1-accept)/V, minlength=V)
+    assert np.allclose(masses, probs/probs.sum())
+
+
+@pytest.mark.parametrize("use_alias_tables", [False, True], ids=["cdf", "alias"])
+def test_sampled_frequencies_match_the_distribution(make_model, use_alias_tables, train_text):
+    model = make_model(train_text)
+    model.use_alias_tables = use_alias_tables
+    context_keys = np.unique([model.get_context_key(sequence) for sequence in get_sequences(train_text)])
+    probs = model.get_sampling_distribution(context_keys)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    np.random.seed(0)
+    chars = model.sample_next_chars(np.repeat(context_keys, NUM_SAMPLES)).reshape(len(context_keys), NUM_SAMPLES)
+    V = probs.shape[1]
+    frequencies = np.stack([np.bincount(row, minlength=V) for row in chars]) / NUM_SAMPLES
+
+    # chars without probability are never sampled; the others within 5 standard deviations
+    assert np.all(frequencies[probs == 0] == 0)
+    assert np.all(np.abs(frequencies - probs) <= 5*np.sqrt(probs*(1-probs)/NUM_SAMPLES) + 1e-12)
+
+
+def test_alias_and_cdf_sampling_agree(train_text):
+    model = ngram.TrigramModel(train_text)
+    context_keys = np.repeat(np.array([model.get_context_key(sequence) for sequence in SEQUENCES]), NUM_SAMPLES)
+    V = len(get_vocab())
+
+    frequencies = []
+    for use_alias_tables in (False, True):
+        model.use_alias_tables = use_alias_tables
+        np.random.seed(1)
+        chars = model.sample_next_chars(context_keys).reshape(len(SEQUENCES), NUM_SAMPLES)
+        frequencies.append(np.stack([np.bincount(row, minlength=V) for row in chars]) / NUM_SAMPLES)
+    assert np.allclose(frequencies[0], frequencies[1], atol=0.02)
+
+    np.random.seed(2)
+    names = model.generate_names(50, prefix=["a"])
+    assert all(name.startswith("a") for name in names)
+
+
+@pytest.mark.parametrize("k", [1, 3, 50])
+def test_most_likely_chars_equal_argsort(make_model, k, train_text):
+    model = make_model(train_text)
+    sequences = get_sequences(train_text)
+    probs = model.get_next_char_distribution(np.array([model.get_context_key(sequence) for sequence in sequences]))
+    itos = get_vocab().get_itos()
+
+    expected = [[itos[i] for i in np.argsort(-row, kind="stable")[:min(k, np.count_nonzero(row))]] for row in probs]
+    assert model.get_most_likely_chars_batch(sequences, k) == expected
+    assert [model.get_most_likely_chars(sequence, k) for sequence in sequences] == expected
@@ -0,0 +1,120 @@
+"""
+An n-gram model written by save and read back by load must score, rank and
+sample like the original; the loaded arrays are copy-on-write memory maps of the file.
+"""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from names_lm import data, ngram
+from names_lm.data import (ARRAY_FILE_MAGIC, ARRAY_FILE_VERSION, build_vocab_from_itos,
+                           read_array_file, write_array_file, set_vocab)
+
+from tests.conftest import SEQUENCES, flatten_probabilities
+
+
+def assert_same_predictions(model, expected, text):
+    assert np.isclose(model.get_perplexity(text), expected.get_perplexity(text), rtol=1e-12)
+    for sequence in SEQUENCES:
+        assert model.get_most_likely_chars(sequence, 5) == expected.get_most_likely_chars(sequence, 5)
+    assert flatten_probabilities(model.get_next_char_probabilities()) == \
+        pytest.approx(flatten_probabilities(expected.get_next_char_probabilities()))
+
+
+def test_save_load_round_trip(make_model, count_with_arrays, train_text, extra_text, tmp_path):
+    model = make_model(train_text)
+    path = str(tmp_path / "model.bin")
+    model.save(path)
+
+    loaded = ngram.NGramLanguageModel.load(path)
+    assert type(loaded) is type(model)
+    assert {name: getattr(loaded, name) for name in model.param_names} == \
+        {name: getattr(model, name) for name in model.param_names}
+    assert_same_predictions(loaded, model, extra_text)
+
+    np.random.seed(0)
+    names = model.generate_names(20)
+    np.random.seed(0)
+    assert loaded.generate_names(20) == names
+
+
+def test_loaded_model_is_a_copy_on_write_map(train_text, extra_text, tmp_path):
+    model = ngram.TrigramModel(train_text)
+    path = str(tmp_path / "model.bin")
+    model.save(path)
+    with open(path, "rb") as file:
+        content = file.read()
+
+    loaded = ngram.TrigramModel.load(path)
+    assert isinstance(loaded.trigram_counts.counts, np.memmap)
+
+    # updating the loaded model changes its copy of the pages, not the file
+    loaded.update(extra_text)
+    assert_same_predictions(loaded, ngram.TrigramModel(train_text + extra_text), train_text[:100])
+    with open(path, "rb") as file:
+        assert file.read() == content
+    assert_same_predictions(ngram.TrigramModel.load(path), model, extra_text)
+
+
+def test_load_checks_the_class_and_the_vocabulary(train_text, vocab, tmp_path):
+    path = str(tmp_path / "model.bin")
+    ngram.BigramModel(train_text).save(path)
+
+    with pytest.raises(ValueError):
+        ngram.TrigramModel.load(path)
+
+    set_vocab(build_vocab_from_itos(vocab.get_itos() + ["z"]))
+    with pytest.raises(ValueError):
+        ngram.NGramLanguageModel.load(path)
+
+
+def test_load_sets_the_saved_vocabulary_when_none_is_set(train_text, extra_text, vocab, monkeypatch, tmp_path):
+    path = str(tmp_path / "model.bin")
+    model = ngram.TrigramModel(train_text)
+    model.save(path)
+
+    monkeypatch.setattr(data, "vocab", None)
+    loaded = ngram.NGramLanguageModel.load(path)
+    assert data.get_vocab().get_itos() == vocab.get_itos()
+    assert_same_predictions(loaded, model, extra_text)
+
+
+def test_load_in_a_new_process(train_text, extra_text, tmp_path):
+    path = str(tmp_path / "model.bin")
+    model = ngram.TrigramModel(train_text)
+    model.save(path)
+
+    script = "import sys; from names_lm import ngram; " \
+             "print(ngram.NGramLanguageModel.load(sys.argv[1]).get_most_likely_chars([], 3))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script, path], cwd=root, check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == str(model.get_most_likely_chars([], 3))
+
+
+def test_array_file_round_trip(tmp_path):
+    path = str(tmp_path / "arrays.bin")
+    arrays = {"ids": np.arange(10, dtype=np.int16), "table": np.linspace(0, 1, 12).reshape(3, 4)}
+    write_array_file(path, {"name": "test"}, arrays)
+
+    header, loaded = read_array_file(path)
+    assert header["name"] == "test"
+    assert loaded.keys() == arrays.keys()
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype
+        assert np.array_equal(loaded[name], array)
+
+
+def test_read_array_file_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not an array file")
+    with pytest.raises(ValueError):
+        read_array_file(str(path))
+
+    path.write_bytes(ARRAY_FILE_MAGIC + np.uint32(ARRAY_FILE_VERSION + 1).tobytes())
+    with pytest.raises(ValueError):
+        read_array_file(str(path))
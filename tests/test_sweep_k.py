@@ -0,0 +1,37 @@
+"""
+The perplexities of add-k smoothing computed for all the k values at once by
+sweep_k must be those of an add-k bigram model built for every k.
+"""
+
+import numpy as np
+
+from names_lm import ngram
+from names_lm.data import START, END
+
+
+KS = [1e-6, 1e-3, 0.01, 0.1, 0.5, 1.0, 2.0, 10.0] # values of k swept, down to nearly unsmoothed
+
+
+def test_sweep_k_equals_a_model_per_k(count_with_arrays, train_text, extra_text):
+    perplexities, best_k = ngram.LaplaceSmoothedBigramModel.sweep_k(train_text, extra_text, KS)
+
+    expected = [ngram.LaplaceSmoothedBigramModel(train_text, k=k).get_perplexity(extra_text) for k in KS]
+    assert np.allclose(perplexities, expected, rtol=1e-9)
+    assert best_k == KS[int(np.argmin(expected))]
+
+
+def test_sweep_k_with_unseen_bigrams(train_text, extra_text):
+    # no name of the train text is empty, so the bigram START, END is unseen
+    text = extra_text[:50] + [[START, END]]
+    perplexities, _ = ngram.LaplaceSmoothedBigramModel.sweep_k(train_text, text, KS)
+
+    expected = [ngram.LaplaceSmoothedBigramModel(train_text, k=k).get_perplexity(text) for k in KS]
+    assert np.all(np.isfinite(perplexities))
+    assert np.allclose(perplexities, expected, rtol=1e-9)
+
+
+def test_sweep_k_on_the_train_text(train_text):
+    perplexities, _ = ngram.LaplaceSmoothedBigramModel.sweep_k(train_text, train_text, KS)
+
+    expected = [ngram.LaplaceSmoothedBigramModel(train_text, k=k).get_perplexity(train_text) for k in KS]
+    assert np.allclose(perplexities, expected, rtol=1e-9)
@@ -0,0 +1,59 @@
+"""
+Adding names to an n-gram model with update, or the counts of another model
+with merge, must give the model fitted on all the names at once, including
+the probabilities cached before the counts changed.
+"""
+
+import numpy as np
+import pytest
+
+from names_lm import ngram
+
+from tests.conftest import SEQUENCES, flatten_probabilities
+
+
+def use_model(model, text):
+    """
+    Fills the caches of a model: probability tables, sampling and top-k rows, nested dictionary
+    """
+
+    model.get_perplexity(text)
+    model.get_next_char_probabilities()
+    model.generate_names(5)
+    for sequence in SEQUENCES:
+        model.get_most_likely_chars(sequence, 5)
+
+
+def assert_same_model(model, expected, text):
+    assert np.isclose(model.get_perplexity(text), expected.get_perplexity(text), rtol=1e-9)
+    for sequence in SEQUENCES:
+        assert model.get_most_likely_chars(sequence, 5) == expected.get_most_likely_chars(sequence, 5)
+
+    probabilities = flatten_probabilities(model.get_next_char_probabilities())
+    expected_probabilities = flatten_probabilities(expected.get_next_char_probabilities())
+    assert probabilities.keys() == expected_probabilities.keys()
+    keys = list(expected_probabilities)
+    assert np.allclose([probabilities[key] for key in keys], [expected_probabilities[key] for key in keys])
+
+
+def test_update_equals_refit(make_model, count_with_arrays, train_text, extra_text):
+    text = train_text[:100] + extra_text[:100]
+    model = make_model(train_text)
+    use_model(model, text)
+    model.update(extra_text)
+    assert_same_model(model, make_model(train_text + extra_text), text)
+
+
+def test_merge_equals_refit(make_model, count_with_arrays, train_text, extra_text):
+    text = train_text[:100] + extra_text[:100]
+    model = make_model(train_text)
+    use_model(model, text)
+    model.merge(make_model(extra_text))
+    assert_same_model(model, make_model(train_text + extra_text), text)
+
+
+def test_merge_rejects_other_kinds_of_models(train_text):
+    with pytest.raises(ValueError):
+        ngram.BigramModel(train_text).merge(ngram.TrigramModel(train_text))
+    with pytest.raises(ValueError):
+        ngram.NGramLanguageModel(train_text, n=4).merge(ngram.NGramLanguageModel(train_text, n=3))
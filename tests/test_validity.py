@@ -0,0 +1,53 @@
+"""
+The vectorized check_validity_of_table must give the verdict of check_validity,
+on the distributions of valid models as well as on deliberately invalid ones.
+"""
+
+import numpy as np
+import pytest
+
+from names_lm import ngram
+from names_lm.evaluation import (check_validity, check_validity_of_table, validate_probability_distribution,
+                                 validate_probability_table)
+
+
+def test_verdicts_of_valid_models(make_model, count_with_arrays, train_text):
+    model = make_model(train_text)
+    # check_validity only checks models of up to 3-grams, and accepts the others
+    assert check_validity_of_table(model, model.n, False) is True
+    assert check_validity(model, model.n, False) is True
+
+
+@pytest.mark.parametrize("model_class, name, cell", [
+    (ngram.UnigramModel, "unigram_counts", (5,)),
+    (ngram.BigramModel, "bigram_counts", (3, 4)),
+    (ngram.TrigramModel, "trigram_counts", (3, 4, 5)),
+])
+def test_verdicts_of_invalid_models(model_class, name, cell, train_text, capsys):
+    model = model_class(train_text)
+    # a negative count gives a negative probability
+    getattr(model, name).counts[cell] = -1
+    model.clear_caches()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        assert check_validity_of_table(model, model.n, False) is False
+        assert "Negative value in probabilities after the contexts" in capsys.readouterr().out
+        assert check_validity(model, model.n, False) is False
+        assert "Negative value in probabilities" in capsys.readouterr().out
+
+
+def test_validate_probability_table_equals_rows():
+    rng = np.random.default_rng(0)
+    probs = rng.dirichlet(np.ones(6), size=8)
+    probs[1, 2] = -0.1
+    probs[3, 0] = 1.5
+    probs[5] *= 1.01
+    probs[6] += 1e-5
+
+    invalid = validate_probability_table(probs)
+    assert {reason: rows.tolist() for reason, rows in invalid.items()} == \
+        {"negative": [1], "larger_than_one": [3], "not_normalized": [1, 3, 5]}
+
+    invalid_rows = set(np.concatenate(list(invalid.values())).tolist())
+    for i, row in enumerate(probs):
+        assert validate_probability_distribution(list(row)) == (i not in invalid_rows)
+    assert validate_probability_table(probs[[0, 2, 4, 6, 7]]) == {}